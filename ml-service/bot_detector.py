@@ -21,10 +21,10 @@ Usage:
     detector = EnsembleBotDetector()
     X, y = build_balanced_dataset(training_rows)
     metrics = detector.fit(X, y)
-    detector.save("bot_model.json")
+    detector.save("bot_model.npz")
     
     # Inference
-    detector = EnsembleBotDetector.load("bot_model.json")
+    detector = EnsembleBotDetector.load("bot_model.npz")
     result = detector.predict(user_behavior_features)
     # result = {"bot_probability": 0.87, "confidence": 0.92, "flags": [...]}
 """
@@ -32,7 +32,8 @@ Usage:
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import itertools
 import json
 import math
 import pathlib
@@ -104,73 +105,227 @@ def _safe_float(v: Any, default: float = 0.0) -> float:
         return default
 
 
-def behavior_features_to_vector(behavior_features: Dict[str, Any] | None) -> np.ndarray:
+# Added to every column's std at fit time, so constant columns don't divide by 0.
+_SIGMA_EPS = 1e-6
+
+
+def _constant_columns(mu: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """
+    Best-effort constant-column mask for models saved without one: sigma at
+    the _SIGMA_EPS floor, allowing only for float32 rounding of the mean.
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    sigma = np.asarray(sigma, dtype=np.float64)
+    return sigma <= _SIGMA_EPS + 4 * np.finfo(np.float32).eps * np.abs(mu)
+
+
+def _inverse_sigma(mu: np.ndarray, sigma: np.ndarray, constant: np.ndarray | None) -> np.ndarray:
+    """
+    1/sigma per column (float64), with 0 for columns that were constant in
+    training. Such a column always standardized to 0, so dropping it keeps
+    that exact instead of folding in two ~1e6-sized terms that must cancel
+    in float32.
+    """
+    if constant is None:
+        constant = _constant_columns(mu, sigma)
+    return np.where(constant, 0.0, 1.0 / np.asarray(sigma, dtype=np.float64))
+
+
+def _quantize_per_channel(W: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric int8 quantization with one scale per output column.
+    Returns (int8 weights, float32 scales) where W ≈ q * scales.
+    """
+    W = np.asarray(W, dtype=np.float32)
+    max_abs = np.abs(W).max(axis=0)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.rint(W / scales), -127, 127).astype(np.int8)
+    return q, scales
+
+
+def _dequantize(q: Any, scales: Any) -> np.ndarray:
+    return np.array(q, dtype=np.float32) * np.array(scales, dtype=np.float32)
+
+
+def _as_float32(a: Any) -> np.ndarray:
+    return np.array(a, dtype=np.float32)
+
+
+def _to_bf16(a: np.ndarray) -> np.ndarray:
+    """
+    bfloat16 bit patterns (uint16) for a float array: the top half of each
+    float32, rounded to nearest even. NumPy has no bf16 dtype of its own.
+    """
+    bits = np.ascontiguousarray(a, dtype=np.float32).view(np.uint32)
+    bits = bits + (np.uint32(0x7FFF) + ((bits >> 16) & 1))
+    return (bits >> 16).astype(np.uint16)
+
+
+def _from_bf16(bits: Any) -> np.ndarray:
+    """Widen bfloat16 bit patterns back to float32 (exact)."""
+    return (np.array(bits, dtype=np.uint32) << 16).view(np.float32)
+
+
+# Sigmoid lookup table for inference: 1025 samples over [-8, 8] (outside
+# that range sigmoid is within 3.4e-4 of 0/1). Nearest-entry lookup is
+# accurate to ~2e-3; training keeps the exact exp form.
+_SIGMOID_LUT_LIMIT = 8.0
+_SIGMOID_LUT = (1.0 / (1.0 + np.exp(-np.linspace(-_SIGMOID_LUT_LIMIT, _SIGMOID_LUT_LIMIT, 1025)))).astype(np.float32)
+_SIGMOID_LUT_SCALE = (len(_SIGMOID_LUT) - 1) / (2 * _SIGMOID_LUT_LIMIT)
+
+
+def _sigmoid_lut(z: np.ndarray) -> np.ndarray:
+    idx = np.clip(z, -_SIGMOID_LUT_LIMIT, _SIGMOID_LUT_LIMIT)
+    idx += _SIGMOID_LUT_LIMIT
+    idx *= _SIGMOID_LUT_SCALE
+    idx += 0.5
+    return _SIGMOID_LUT[idx.astype(np.intp)]
+
+
+# Raw behavior field and default backing each FEATURE_KEYS column, in order.
+# Derived columns (temporalCV, likeCommentRatio) are seeded with their
+# numerator here and finished in a vectorized pass.
+_RAW_COLUMNS: List[Tuple[str, float]] = [
+    # Temporal
+    ("eventCount", 0.0),
+    ("intervalMeanSec", 1.0),
+    ("intervalStdSec", 0.0),            # -> temporalCV
+    ("intervalRegularity", 0.0),
+    ("circadianStrength", 0.0),
+    ("maxInactivityGapHours", 0.0),
+    ("midnightActivityRatio", 0.0),
+    ("weekendActivityRatio", 0.5),      # Default 0.5 = balanced
+    ("burstinessScore", 0.0),
+    ("sessionDurationMean", 0.0),
+    ("sessionDurationStd", 0.0),
+
+    # Content
+    ("avgTimeOnPost", 0.0),
+    ("stdTimeOnPost", 0.0),
+    ("rapidScrollPct", 0.0),
+    ("completionRate", 0.0),
+    ("uniquePostRatio", 1.0),
+
+    # Social
+    ("replyCount", 0.0),
+    ("fastReplyPct", 0.0),
+    ("likeCount", 0.0),                 # -> likeCommentRatio
+    ("repeatInteractionPct", 0.0),
+    ("diversityScore", 0.0),
+    ("copyPasteCommentPct", 0.0),
+
+    # Navigation
+    ("directNavigationPct", 0.0),
+    ("backtrackRate", 0.0),
+    ("depthOfBrowsing", 1.0),
+
+    # Honeypot
+    ("invisibleInteractionCount", 0.0),
+    ("rapidFormFillCount", 0.0),
+    ("cssHoneypotTriggers", 0.0),
+    ("mouseMovementEntropy", 0.5),
+    ("keystrokeDynamicsScore", 0.5),
+
+    # Legacy
+    ("botScore", 0.0),
+]
+
+KEY_COL = {k: j for j, k in enumerate(FEATURE_KEYS)}
+
+# Count features that are log-scaled after the fill.
+_LOG_COLS = [
+    KEY_COL["eventCount"],
+    KEY_COL["replyCount"],
+    KEY_COL["invisibleInteractionCount"],
+    KEY_COL["rapidFormFillCount"],
+    KEY_COL["cssHoneypotTriggers"],
+]
+
+
+_CV_COL = KEY_COL["temporalCV"]
+_INTERVAL_MEAN_COL = KEY_COL["intervalMeanSec"]
+_LIKE_RATIO_COL = KEY_COL["likeCommentRatio"]
+
+
+def _fill_column(rows: List[Dict[str, Any]], key: str, default: float, n: int) -> np.ndarray:
+    values = [f.get(key, default) for f in rows]
+    try:
+        col = np.fromiter(values, dtype=np.float32, count=n)
+        # fromiter turns None into NaN instead of raising.
+        if not np.isnan(col).any():
+            return col
+    except (TypeError, ValueError):
+        pass
+    return np.fromiter(
+        (v if type(v) is float or type(v) is int else _safe_float(v, default) for v in values),
+        dtype=np.float32, count=n,
+    )
+
+
+def behavior_features_batch_to_matrix(rows: Iterable[Dict[str, Any] | None],
+                                      out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Convert many behavior dicts into one (N, len(FEATURE_KEYS)) float32 matrix.
+    Fills the buffer (`out` if given) one feature column at a time (SoA),
+    then applies log-scaling and the derived ratio features column-wise.
+    """
+    rows = [f or {} for f in rows]
+    n = len(rows)
+    if out is None:
+        out = np.empty((n, len(FEATURE_KEYS)), dtype=np.float32)
+
+    # Missing keys resolve to the column default, so a clean column goes
+    # through one np.fromiter call; only a column holding None or a
+    # non-numeric value falls back to per-value _safe_float.
+    for j, (key, default) in enumerate(_RAW_COLUMNS):
+        out[:, j] = _fill_column(rows, key, default, n)
+    comment_count = _fill_column(rows, "commentCount", 1.0, n)
+
+    # ── Derived: Coefficient of Variation (temporal irregularity) ──
+    out[:, KEY_COL["temporalCV"]] /= np.maximum(1.0, out[:, KEY_COL["intervalMeanSec"]])
+
+    # ── Derived: Like/Comment ratio (bots like but don't comment) ──
+    out[:, KEY_COL["likeCommentRatio"]] /= np.maximum(1.0, comment_count)
+
+    # ── Raw counts (log-scaled) ──
+    counts = out[:, _LOG_COLS]
+    np.maximum(counts, 0.0, out=counts)
+    np.log1p(counts, out=counts)
+    out[:, _LOG_COLS] = counts
+
+    return out
+
+
+def behavior_features_to_vector(behavior_features: Dict[str, Any] | None,
+                                out: np.ndarray | None = None) -> np.ndarray:
     """
     Convert behavior dict to fixed-length numpy vector for ML model.
     Applies log-scaling to count features and computes derived features.
+    Single-row fast path: values are gathered into one list and converted
+    once (into `out` if given); matches behavior_features_batch_to_matrix.
     """
     f = behavior_features or {}
-    
-    # ── Raw counts (log-scaled) ──
-    event_count = math.log1p(max(0.0, _safe_float(f.get("eventCount"), 0.0)))
-    reply_count = math.log1p(max(0.0, _safe_float(f.get("replyCount"), 0.0)))
-    
-    # ── Derived: Coefficient of Variation (temporal irregularity) ──
-    interval_mean = _safe_float(f.get("intervalMeanSec"), 1.0)
-    interval_std = _safe_float(f.get("intervalStdSec"), 0.0)
-    temporal_cv = interval_std / max(1.0, interval_mean)
-    
-    # ── Derived: Like/Comment ratio (bots like but don't comment) ──
-    like_count = _safe_float(f.get("likeCount"), 0.0)
-    comment_count = _safe_float(f.get("commentCount"), 1.0)
-    like_comment_ratio = like_count / max(1.0, comment_count)
-    
-    vector = np.array([
-        # Temporal
-        event_count,
-        interval_mean,
-        temporal_cv,
-        _safe_float(f.get("intervalRegularity"), 0.0),
-        _safe_float(f.get("circadianStrength"), 0.0),
-        _safe_float(f.get("maxInactivityGapHours"), 0.0),
-        _safe_float(f.get("midnightActivityRatio"), 0.0),
-        _safe_float(f.get("weekendActivityRatio"), 0.5),  # Default 0.5 = balanced
-        _safe_float(f.get("burstinessScore"), 0.0),
-        _safe_float(f.get("sessionDurationMean"), 0.0),
-        _safe_float(f.get("sessionDurationStd"), 0.0),
-        
-        # Content
-        _safe_float(f.get("avgTimeOnPost"), 0.0),
-        _safe_float(f.get("stdTimeOnPost"), 0.0),
-        _safe_float(f.get("rapidScrollPct"), 0.0),
-        _safe_float(f.get("completionRate"), 0.0),
-        _safe_float(f.get("uniquePostRatio"), 1.0),
-        
-        # Social
-        reply_count,
-        _safe_float(f.get("fastReplyPct"), 0.0),
-        like_comment_ratio,
-        _safe_float(f.get("repeatInteractionPct"), 0.0),
-        _safe_float(f.get("diversityScore"), 0.0),
-        _safe_float(f.get("copyPasteCommentPct"), 0.0),
-        
-        # Navigation
-        _safe_float(f.get("directNavigationPct"), 0.0),
-        _safe_float(f.get("backtrackRate"), 0.0),
-        _safe_float(f.get("depthOfBrowsing"), 1.0),
-        
-        # Honeypot
-        math.log1p(_safe_float(f.get("invisibleInteractionCount"), 0.0)),
-        math.log1p(_safe_float(f.get("rapidFormFillCount"), 0.0)),
-        math.log1p(_safe_float(f.get("cssHoneypotTriggers"), 0.0)),
-        _safe_float(f.get("mouseMovementEntropy"), 0.5),
-        _safe_float(f.get("keystrokeDynamicsScore"), 0.5),
-        
-        # Legacy
-        _safe_float(f.get("botScore"), 0.0),
-    ], dtype=np.float32)
-    
-    return vector
+    values = [
+        v if type(v) is float or type(v) is int else _safe_float(v, default)
+        for key, default in _RAW_COLUMNS
+        for v in (f.get(key, default),)
+    ]
+    if out is None:
+        out = np.array(values, dtype=np.float32)
+    else:
+        out[:] = values
+    comment_count = f.get("commentCount", 1.0)
+    if not (type(comment_count) is float or type(comment_count) is int):
+        comment_count = _safe_float(comment_count, 1.0)
+
+    # Same float32 arithmetic as the batch path, on scalars.
+    out[_CV_COL] /= np.maximum(np.float32(1.0), out[_INTERVAL_MEAN_COL])
+    out[_LIKE_RATIO_COL] /= np.maximum(np.float32(1.0), np.float32(comment_count))
+    counts = out[_LOG_COLS]
+    np.maximum(counts, 0.0, out=counts)
+    np.log1p(counts, out=counts)
+    out[_LOG_COLS] = counts
+    return out
 
 
 def account_doc_to_vector(account_doc: Dict[str, Any]) -> np.ndarray:
@@ -204,37 +359,139 @@ class NeuralBotDetector:
         self.b2: float = 0.0
         self.mu: np.ndarray | None = None
         self.sigma: np.ndarray | None = None
+        # Columns with zero variance in training; dropped when folding
+        self.constant: np.ndarray | None = None
+        self._rng = np.random.default_rng()
+        # Inference-time W1/b1 with mu/sigma folded in (see _forward_inference)
+        self._W1_folded: np.ndarray | None = None
+        self._b1_folded: np.ndarray | None = None
 
     @staticmethod
     def _relu(x: np.ndarray) -> np.ndarray:
         return np.maximum(0, x)
 
     @staticmethod
-    def _sigmoid(z: np.ndarray) -> np.ndarray:
+    def _sigmoid(z: np.ndarray, fast: bool = False) -> np.ndarray:
+        if fast:
+            return _sigmoid_lut(z)
         z = np.clip(z, -40.0, 40.0)
         return 1.0 / (1.0 + np.exp(-z))
 
     def _normalize_fit(self, X: np.ndarray) -> np.ndarray:
-        self.mu = X.mean(axis=0)
-        self.sigma = X.std(axis=0) + 1e-6
-        return (X - self.mu) / self.sigma
+        # One float32 copy, standardized in place (no (X - mu) temporary).
+        Xn = np.array(X, dtype=np.float32, order="C")
+        self.mu = Xn.mean(axis=0)
+        self.constant = (Xn == Xn[:1]).all(axis=0)
+        self.sigma = Xn.std(axis=0) + _SIGMA_EPS
+        Xn -= self.mu
+        Xn /= self.sigma
+        return Xn
 
     def _normalize_apply(self, X: np.ndarray) -> np.ndarray:
         if self.mu is None or self.sigma is None:
             raise RuntimeError("Model not fitted")
-        return (X - self.mu) / self.sigma
+        Xn = np.array(X, dtype=np.float32, order="C")
+        Xn -= self.mu
+        Xn /= self.sigma
+        return Xn
 
-    def _forward(self, X: np.ndarray, training: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    def _forward(self, X: np.ndarray, fast: bool = False) -> Tuple[np.ndarray, np.ndarray]:
         h = self._relu(X @ self.W1 + self.b1)
-        
-        if training:
-            mask = np.random.binomial(1, 1 - self.dropout, size=h.shape)
-            h = h * mask / (1 - self.dropout)
-        
         logits = h @ self.W2 + self.b2
-        probs = self._sigmoid(logits).flatten()
+        probs = self._sigmoid(logits, fast=fast).flatten()
         return probs, h
 
+    def _alloc_scratch(self, n: int, d: int) -> Dict[str, np.ndarray]:
+        """Per-fit work buffers reused by every _train_epoch call."""
+        H = self.hidden_dim
+        return {
+            "h": np.empty((n, H), dtype=np.float32),
+            "d_h": np.empty((n, H), dtype=np.float32),
+            "mask": np.empty((n, H), dtype=np.float32),
+            "active": np.empty((n, H), dtype=bool),
+            "probs": np.empty(n, dtype=np.float32),
+            "log_p": np.empty(n, dtype=np.float32),
+            "log_q": np.empty(n, dtype=np.float32),
+            "d_W1": np.empty((d, H), dtype=np.float32),
+            "d_W2": np.empty(H, dtype=np.float32),
+            "d_b1": np.empty(H, dtype=np.float32),
+        }
+
+    def _forward_inference(self, X: np.ndarray, fast: bool = True) -> np.ndarray:
+        """Probabilities for raw (unnormalized) features via the folded first layer."""
+        if self._W1_folded is None:
+            self._W1_folded, self._b1_folded = self._folded_weights()
+        h = X @ self._W1_folded
+        h += self._b1_folded
+        np.maximum(h, 0.0, out=h)
+        logits = h @ self.W2[:, 0]
+        logits += self.b2
+        return self._sigmoid(logits, fast=fast)
+
+    def _train_epoch(self, Xn: np.ndarray, y: np.ndarray, one_minus_y: np.ndarray,
+                     scratch: Dict[str, np.ndarray]) -> float:
+        """
+        One fused full-batch step: forward with dropout, BCE loss, backprop
+        and weight update, written into the preallocated scratch buffers.
+        """
+        n = Xn.shape[0]
+        w2 = self.W2[:, 0]
+        h, d_h, probs = scratch["h"], scratch["d_h"], scratch["probs"]
+
+        # Forward: affine + ReLU + inverted dropout
+        np.matmul(Xn, self.W1, out=h)
+        h += self.b1
+        np.maximum(h, 0.0, out=h)
+        if self.dropout > 0:
+            # Bernoulli keep-mask from one uniform draw into a reused buffer
+            mask = self._rng.random(dtype=np.float32, out=scratch["mask"])
+            h *= np.greater_equal(mask, self.dropout, out=scratch["active"])
+            h *= 1.0 / (1.0 - self.dropout)
+
+        np.matmul(h, w2, out=probs)
+        probs += self.b2
+        np.clip(probs, -40.0, 40.0, out=probs)
+        np.negative(probs, out=probs)
+        np.exp(probs, out=probs)
+        probs += 1.0
+        np.reciprocal(probs, out=probs)
+
+        # Loss
+        eps = 1e-8
+        log_p, log_q = scratch["log_p"], scratch["log_q"]
+        np.add(probs, eps, out=log_p)
+        np.log(log_p, out=log_p)
+        log_p *= y
+        np.subtract(1.0, probs, out=log_q)
+        log_q += eps
+        np.log(log_q, out=log_q)
+        log_q *= one_minus_y
+        loss = -(float(log_p.sum()) + float(log_q.sum())) / n
+
+        # Backprop (probs buffer becomes d_probs)
+        d_probs = probs
+        d_probs -= y
+        d_probs *= 1.0 / n
+        d_W2 = np.matmul(h.T, d_probs, out=scratch["d_W2"])
+        d_b2 = float(d_probs.sum())
+        np.multiply(d_probs[:, None], w2, out=d_h)
+        d_h *= np.greater(h, 0.0, out=scratch["active"])  # ReLU gradient
+        d_W1 = np.matmul(Xn.T, d_h, out=scratch["d_W1"])
+        d_b1 = np.sum(d_h, axis=0, out=scratch["d_b1"])
+
+        # Update (L2 decay folded into a scale of the old weights)
+        decay = 1.0 - self.lr * self.reg
+        self.W1 *= decay
+        d_W1 *= self.lr
+        self.W1 -= d_W1
+        d_b1 *= self.lr
+        self.b1 -= d_b1
+        w2 *= decay
+        d_W2 *= self.lr
+        w2 -= d_W2
+        self.b2 -= self.lr * d_b2
+        return loss
+
     def fit(self, X: np.ndarray, y: np.ndarray, val_split: float = 0.2) -> Dict[str, float]:
         if X.shape[0] == 0:
             raise ValueError("Empty training set")
@@ -247,49 +504,33 @@ class NeuralBotDetector:
         X_train, y_train = X[indices[n_val:]], y[indices[n_val:]]
         X_val, y_val = X[indices[:n_val]], y[indices[:n_val]]
         
+        self._W1_folded = self._b1_folded = None
         Xn_train = self._normalize_fit(X_train)
         Xn_val = self._normalize_apply(X_val)
         
         n_train, d = Xn_train.shape
         
         # Xavier initialization
-        self.W1 = np.random.randn(d, self.hidden_dim).astype(np.float32) * np.sqrt(2.0 / d)
+        self.W1 = (np.random.randn(d, self.hidden_dim) * np.sqrt(2.0 / d)).astype(np.float32)
         self.b1 = np.zeros(self.hidden_dim, dtype=np.float32)
-        self.W2 = np.random.randn(self.hidden_dim, 1).astype(np.float32) * np.sqrt(2.0 / self.hidden_dim)
+        self.W2 = (np.random.randn(self.hidden_dim, 1) * np.sqrt(2.0 / self.hidden_dim)).astype(np.float32)
         self.b2 = 0.0
         
         y_train = y_train.astype(np.float32)
         y_val = y_val.astype(np.float32)
+        one_minus_y = 1.0 - y_train
+        scratch = self._alloc_scratch(n_train, d)
         
         best_val_loss = float('inf')
         patience_counter = 0
+        eps = 1e-8
         
         for epoch in range(self.epochs):
-            # Forward
-            probs, h = self._forward(Xn_train, training=True)
-            
-            # Loss
-            eps = 1e-8
-            loss = -np.mean(y_train * np.log(probs + eps) + (1 - y_train) * np.log(1 - probs + eps))
-            
-            # Backprop
-            d_probs = (probs - y_train) / n_train
-            d_W2 = (h.T @ d_probs.reshape(-1, 1)) + self.reg * self.W2
-            d_b2 = float(d_probs.sum())
-            d_h = d_probs.reshape(-1, 1) @ self.W2.T
-            d_h[h <= 0] = 0  # ReLU gradient
-            d_W1 = Xn_train.T @ d_h + self.reg * self.W1
-            d_b1 = d_h.sum(axis=0)
-            
-            # Update
-            self.W1 -= self.lr * d_W1
-            self.b1 -= self.lr * d_b1
-            self.W2 -= self.lr * d_W2
-            self.b2 -= self.lr * d_b2
+            loss = self._train_epoch(Xn_train, y_train, one_minus_y, scratch)
             
             # Early stopping
             if epoch % 10 == 0:
-                val_probs, _ = self._forward(Xn_val, training=False)
+                val_probs, _ = self._forward(Xn_val)
                 val_loss = -np.mean(y_val * np.log(val_probs + eps) + (1 - y_val) * np.log(1 - val_probs + eps))
                 
                 if val_loss < best_val_loss:
@@ -301,8 +542,8 @@ class NeuralBotDetector:
                 if patience_counter >= self.patience:
                     break
         
-        train_probs, _ = self._forward(Xn_train, training=False)
-        val_probs, _ = self._forward(Xn_val, training=False)
+        train_probs, _ = self._forward(Xn_train)
+        val_probs, _ = self._forward(Xn_val)
         
         return {
             "train_loss": float(loss),
@@ -311,32 +552,81 @@ class NeuralBotDetector:
             "val_acc": float(((val_probs >= 0.5) == y_val).mean()),
         }
 
-    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
-        if self.W1 is None:
+    def predict_proba_matrix(self, X: np.ndarray, fast: bool = True) -> np.ndarray:
+        if self.W1 is None or self.mu is None or self.sigma is None:
             raise RuntimeError("Model not fitted")
-        Xn = self._normalize_apply(X)
-        probs, _ = self._forward(Xn, training=False)
-        return probs
+        return self._forward_inference(X, fast=fast)
 
     def predict_proba(self, behavior_features: Dict[str, Any] | None) -> float:
         x = behavior_features_to_vector(behavior_features).reshape(1, -1)
         return float(self.predict_proba_matrix(x)[0])
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, arrays: bool = False, bf16: bool = False) -> Dict[str, Any]:
+        """
+        Parameters as JSON lists, or as ndarrays with arrays=True (NPZ).
+        bf16=True stores W1/W2 as bfloat16 bit patterns (half the size).
+        """
         if self.W1 is None:
             raise RuntimeError("Model not fitted")
+        enc = np.asarray if arrays else np.ndarray.tolist
+        wenc = (lambda a: enc(_to_bf16(a))) if bf16 else enc
         return {
             "type": "neural",
             "hidden_dim": self.hidden_dim,
             "lr": self.lr,
             "reg": self.reg,
             "dropout": self.dropout,
-            "W1": self.W1.tolist(),
-            "b1": self.b1.tolist(),
-            "W2": self.W2.tolist(),
+            "weight_dtype": "bfloat16" if bf16 else "float32",
+            "W1": wenc(self.W1),
+            "b1": enc(self.b1),
+            "W2": wenc(self.W2),
             "b2": self.b2,
-            "mu": self.mu.tolist(),
-            "sigma": self.sigma.tolist(),
+            "mu": enc(self.mu),
+            "sigma": enc(self.sigma),
+            "constant": enc(self.constant),
+        }
+
+    def _folded_weights(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        W1/b1 with the input standardization folded in: x @ W + b == (x-mu)/sigma @ W1 + b1.
+        Columns constant in training get zero rows (see _inverse_sigma).
+        """
+        inv = _inverse_sigma(self.mu, self.sigma, self.constant)
+        W1 = self.W1.astype(np.float64)
+        W = (W1 * inv[:, None]).astype(np.float32)
+        b = (self.b1 - (self.mu * inv) @ W1).astype(np.float32)
+        return W, b
+
+    def to_quantized_dict(self, arrays: bool = False) -> Dict[str, Any]:
+        """
+        Deployment export: int8 weights with per-output-channel scales
+        (~4x smaller than to_dict). W1 is quantized before folding, since
+        dividing by sigma would let a few small-sigma rows set every scale;
+        mu/sigma stay float and are folded in at load time.
+        """
+        if self.W1 is None:
+            raise RuntimeError("Model not fitted")
+        enc = np.asarray if arrays else np.ndarray.tolist
+        # Rows of training-constant columns are dropped by the fold anyway;
+        # zero them so they can't inflate the scales.
+        live = _inverse_sigma(self.mu, self.sigma, self.constant) > 0
+        W1_q, W1_scale = _quantize_per_channel(self.W1 * live[:, None])
+        W2_q, W2_scale = _quantize_per_channel(self.W2)
+        return {
+            "type": "neural_int8",
+            "hidden_dim": self.hidden_dim,
+            "lr": self.lr,
+            "reg": self.reg,
+            "dropout": self.dropout,
+            "W1_q": enc(W1_q),
+            "W1_scale": enc(W1_scale),
+            "b1": enc(self.b1),
+            "W2_q": enc(W2_q),
+            "W2_scale": enc(W2_scale),
+            "b2": self.b2,
+            "mu": enc(self.mu),
+            "sigma": enc(self.sigma),
+            "constant": enc(self.constant),
         }
 
     @classmethod
@@ -347,12 +637,22 @@ class NeuralBotDetector:
             reg=float(data.get("reg", 1e-4)),
             dropout=float(data.get("dropout", 0.3)),
         )
-        model.W1 = np.array(data["W1"], dtype=np.float32)
         model.b1 = np.array(data["b1"], dtype=np.float32)
-        model.W2 = np.array(data["W2"], dtype=np.float32)
         model.b2 = float(data["b2"])
+        if data.get("type") == "neural_int8":
+            model.W1 = _dequantize(data["W1_q"], data["W1_scale"])
+            model.W2 = _dequantize(data["W2_q"], data["W2_scale"])
+        else:
+            wdec = _from_bf16 if data.get("weight_dtype") == "bfloat16" else _as_float32
+            model.W1 = wdec(data["W1"])
+            model.W2 = wdec(data["W2"])
         model.mu = np.array(data["mu"], dtype=np.float32)
         model.sigma = np.array(data["sigma"], dtype=np.float32)
+        if "constant" in data:
+            model.constant = np.array(data["constant"], dtype=bool)
+        else:
+            model.constant = _constant_columns(model.mu, model.sigma)
+        model._W1_folded, model._b1_folded = model._folded_weights()
         return model
 
 
@@ -365,81 +665,184 @@ class LogisticBotDetector:
     """Fast logistic regression baseline for comparison."""
     lr: float = 0.05
     reg: float = 1e-4
-    epochs: int = 700
+    epochs: int = 50        # passes over the training set
+    batch_size: int = 64
 
     def __post_init__(self) -> None:
         self.w: np.ndarray | None = None
         self.b: float = 0.0
         self.mu: np.ndarray | None = None
         self.sigma: np.ndarray | None = None
+        # Columns with zero variance in training; dropped when folding
+        self.constant: np.ndarray | None = None
+        # Inference-time w/b with mu/sigma folded in
+        self._w_folded: np.ndarray | None = None
+        self._b_folded: float = 0.0
 
     @staticmethod
-    def _sigmoid(z: np.ndarray) -> np.ndarray:
+    def _sigmoid(z: np.ndarray, fast: bool = False) -> np.ndarray:
+        if fast:
+            return _sigmoid_lut(z)
         z = np.clip(z, -40.0, 40.0)
         return 1.0 / (1.0 + np.exp(-z))
 
     def _normalize_fit(self, X: np.ndarray) -> np.ndarray:
-        self.mu = X.mean(axis=0)
-        self.sigma = X.std(axis=0) + 1e-6
-        return (X - self.mu) / self.sigma
+        # One float32 copy, standardized in place (no (X - mu) temporary).
+        Xn = np.array(X, dtype=np.float32, order="C")
+        self.mu = Xn.mean(axis=0)
+        self.constant = (Xn == Xn[:1]).all(axis=0)
+        self.sigma = Xn.std(axis=0) + _SIGMA_EPS
+        Xn -= self.mu
+        Xn /= self.sigma
+        return Xn
 
     def _normalize_apply(self, X: np.ndarray) -> np.ndarray:
         if self.mu is None or self.sigma is None:
             raise RuntimeError("Model not fitted")
-        return (X - self.mu) / self.sigma
+        Xn = np.array(X, dtype=np.float32, order="C")
+        Xn -= self.mu
+        Xn /= self.sigma
+        return Xn
 
     def fit(self, X: np.ndarray, y: np.ndarray) -> Dict[str, float]:
         if X.shape[0] == 0:
             raise ValueError("Empty training set")
         
+        self._w_folded = None
         Xn = self._normalize_fit(X)
         n, d = Xn.shape
         self.w = np.zeros(d, dtype=np.float32)
         self.b = 0.0
         y = y.astype(np.float32)
+        # Per-step scratch, reused by every batch
+        z_buf = np.empty(min(n, self.batch_size), dtype=np.float32)
+        grad_buf = np.empty(d, dtype=np.float32)
 
-        for _ in range(self.epochs):
-            logits = Xn @ self.w + self.b
-            p = self._sigmoid(logits)
-            err = p - y
-            self.w -= self.lr * ((Xn.T @ err) / n + self.reg * self.w)
-            self.b -= self.lr * float(err.mean())
+        if n <= self.batch_size:
+            batches = [(Xn, y)]
+        else:
+            # Mini-batch SGD over shuffled batches
+            idx = np.arange(n)
 
-        probs = self.predict_proba_matrix(X)
+        for _ in range(self.epochs):
+            if n > self.batch_size:
+                # One gather per pass; the batches are then contiguous views.
+                np.random.shuffle(idx)
+                Xs, ys = Xn[idx], y[idx]
+                batches = (
+                    (Xs[s:s + self.batch_size], ys[s:s + self.batch_size])
+                    for s in range(0, n, self.batch_size)
+                )
+            for Xb, yb in batches:
+                m = len(yb)
+                err = z_buf[:m]
+                np.dot(Xb, self.w, out=err)
+                err += self.b
+                # In-place sigmoid, then err = p - y
+                np.clip(err, -40.0, 40.0, out=err)
+                np.negative(err, out=err)
+                np.exp(err, out=err)
+                err += 1.0
+                np.reciprocal(err, out=err)
+                err -= yb
+                # err @ Xb == Xb.T @ err, as a gemv on the row-major batch
+                np.dot(err, Xb, out=grad_buf)
+                grad_buf *= self.lr / m
+                self.w *= 1.0 - self.lr * self.reg
+                self.w -= grad_buf
+                self.b -= self.lr * float(err.mean())
+
+        probs = self.predict_proba_matrix(X, fast=False)
         eps = 1e-8
         loss = float(-np.mean(y * np.log(probs + eps) + (1 - y) * np.log(1 - probs + eps)))
         acc = float(((probs >= 0.5) == y).mean())
         return {"loss": loss, "accuracy": acc}
 
-    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
-        if self.w is None:
+    def predict_proba_matrix(self, X: np.ndarray, fast: bool = True) -> np.ndarray:
+        if self.w is None or self.mu is None or self.sigma is None:
             raise RuntimeError("Model not fitted")
-        return self._sigmoid(self._normalize_apply(X) @ self.w + self.b)
+        if self._w_folded is None:
+            self._w_folded, self._b_folded = self._folded_weights()
+        return self._sigmoid(X @ self._w_folded + self._b_folded, fast=fast)
 
     def predict_proba(self, behavior_features: Dict[str, Any] | None) -> float:
         x = behavior_features_to_vector(behavior_features).reshape(1, -1)
         return float(self.predict_proba_matrix(x)[0])
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, arrays: bool = False, bf16: bool = False) -> Dict[str, Any]:
+        """
+        Parameters as JSON lists, or as ndarrays with arrays=True (NPZ).
+        bf16=True stores w as bfloat16 bit patterns.
+        """
         if self.w is None:
             raise RuntimeError("Model not fitted")
+        enc = np.asarray if arrays else np.ndarray.tolist
         return {
             "type": "logistic",
             "lr": self.lr,
             "reg": self.reg,
-            "w": self.w.tolist(),
+            "batch_size": self.batch_size,
+            "weight_dtype": "bfloat16" if bf16 else "float32",
+            "w": enc(_to_bf16(self.w)) if bf16 else enc(self.w),
             "b": self.b,
-            "mu": self.mu.tolist(),
-            "sigma": self.sigma.tolist(),
+            "mu": enc(self.mu),
+            "sigma": enc(self.sigma),
+            "constant": enc(self.constant),
+        }
+
+    def _folded_weights(self) -> Tuple[np.ndarray, float]:
+        """
+        w/b with the input standardization folded in: x @ w + b == (x-mu)/sigma @ w + b.
+        Columns constant in training get zero weight (see _inverse_sigma).
+        """
+        inv = _inverse_sigma(self.mu, self.sigma, self.constant)
+        w = self.w.astype(np.float64)
+        b = float(self.b - (self.mu * inv) @ w)
+        return (w * inv).astype(np.float32), b
+
+    def to_quantized_dict(self, arrays: bool = False) -> Dict[str, Any]:
+        """
+        Deployment export: int8 w with one scale, quantized before folding
+        (see NeuralBotDetector.to_quantized_dict); mu/sigma stay float.
+        """
+        if self.w is None:
+            raise RuntimeError("Model not fitted")
+        enc = np.asarray if arrays else np.ndarray.tolist
+        live = _inverse_sigma(self.mu, self.sigma, self.constant) > 0
+        w_q, w_scale = _quantize_per_channel((self.w * live).reshape(-1, 1))
+        return {
+            "type": "logistic_int8",
+            "lr": self.lr,
+            "reg": self.reg,
+            "batch_size": self.batch_size,
+            "w_q": enc(w_q[:, 0]),
+            "w_scale": float(w_scale[0]),
+            "b": self.b,
+            "mu": enc(self.mu),
+            "sigma": enc(self.sigma),
+            "constant": enc(self.constant),
         }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "LogisticBotDetector":
-        model = cls(lr=float(data.get("lr", 0.05)), reg=float(data.get("reg", 1e-4)))
-        model.w = np.array(data["w"], dtype=np.float32)
+        model = cls(
+            lr=float(data.get("lr", 0.05)),
+            reg=float(data.get("reg", 1e-4)),
+            batch_size=int(data.get("batch_size", 64)),
+        )
         model.b = float(data["b"])
+        if data.get("type") == "logistic_int8":
+            model.w = _dequantize(data["w_q"], data["w_scale"])
+        else:
+            wdec = _from_bf16 if data.get("weight_dtype") == "bfloat16" else _as_float32
+            model.w = wdec(data["w"])
         model.mu = np.array(data["mu"], dtype=np.float32)
         model.sigma = np.array(data["sigma"], dtype=np.float32)
+        if "constant" in data:
+            model.constant = np.array(data["constant"], dtype=bool)
+        else:
+            model.constant = _constant_columns(model.mu, model.sigma)
+        model._w_folded, model._b_folded = model._folded_weights()
         return model
 
 
@@ -447,71 +850,110 @@ class LogisticBotDetector:
 # RULE-BASED DETECTOR
 # ==========================================
 
+# (feature, comparison, threshold, weight, flag), evaluated in order.
+# A rule's position is its bit in the packed flag masks. Honeypot rules
+# come first: once the running score reaches 1.0 evaluation stops, since
+# the min(1.0, score) cap makes every later rule dead work.
+RULES: List[Tuple[str, str, float, float, str]] = [
+    # ── Honeypot triggers (CRITICAL) ──
+    ("invisibleInteractionCount", ">", 0, 0.30, "HONEYPOT_invisible_click"),
+    ("cssHoneypotTriggers", ">", 0, 0.30, "HONEYPOT_css_hidden_interaction"),
+    ("rapidFormFillCount", ">", 2, 0.25, "HONEYPOT_instant_form_fill"),
+    ("mouseMovementEntropy", "<", 0.1, 0.20, "no_mouse_movement_variance"),
+
+    # ── Temporal red flags ──
+    ("intervalRegularity", ">", 0.95, 0.25, "machine_like_timing"),
+    ("midnightActivityRatio", ">", 0.5, 0.15, "nocturnal_activity"),
+    ("maxInactivityGapHours", "<", 2.0, 0.10, "no_sleep_detected"),
+
+    # ── Interaction red flags ──
+    ("fastReplyPct", ">", 0.8, 0.20, "superhuman_reply_speed"),
+    ("avgTimeOnPost", "<", 1.0, 0.15, "impossible_read_speed"),
+    ("likeCommentRatio", ">", 10, 0.15, "excessive_likes_no_comments"),
+    ("copyPasteCommentPct", ">", 0.5, 0.20, "repetitive_comments"),
+
+    # ── Navigation patterns ──
+    ("directNavigationPct", ">", 0.9, 0.10, "scripted_navigation"),
+]
+
+
+def _compile_rules(rules: List[Tuple[str, str, float, float, str]]) -> Callable[[Dict[str, Any]], Tuple[float, List[str]]]:
+    """
+    Generate a straight-line evaluator for `rules`: one inlined compare per
+    rule with keys, thresholds and weights as literals, so a call does no
+    table iteration or attribute lookups; float values skip _safe_float.
+    A saturation exit is emitted after each rule whose prefix weight sum
+    can reach 1.0.
+    """
+    lines = [
+        "def _eval_rules(features, _safe_float=_safe_float):",
+        "    get = features.get",
+        "    score = 0.0",
+        "    flags = []",
+    ]
+    reachable = 0.0
+    for i, (key, op, threshold, weight, flag) in enumerate(rules):
+        if op not in ("<", ">"):
+            raise ValueError(f"Unsupported rule comparison: {op!r}")
+        lines += [
+            f"    v = get({key!r})",
+            "    if type(v) is not float:",
+            "        v = _safe_float(v)",
+            f"    if v {op} {float(threshold)!r}:",
+            f"        score += {float(weight)!r}",
+            f"        flags.append({flag!r})",
+        ]
+        reachable += max(float(weight), 0.0)
+        if reachable >= 1.0 and i < len(rules) - 1:
+            lines += [
+                "        if score >= 1.0:",
+                "            return 1.0, flags",
+            ]
+    lines.append("    return min(1.0, score), flags")
+
+    namespace: Dict[str, Any] = {"_safe_float": _safe_float}
+    exec("\n".join(lines), namespace)
+    return namespace["_eval_rules"]
+
+
 class RuleBasedDetector:
     """
     Hard-coded rules for obvious bot patterns.
     High precision, low recall — used as ensemble component.
     """
-    
+
+    def __init__(self, rules: List[Tuple[str, str, float, float, str]] | None = None) -> None:
+        self.rules = list(RULES if rules is None else rules)
+        self._eval = _compile_rules(self.rules)
+
     def compute_score(self, features: Dict[str, Any]) -> Tuple[float, List[str]]:
         """Returns (score, [list of triggered flags])"""
-        score = 0.0
-        flags = []
-        
-        # ── Temporal red flags ──
-        if _safe_float(features.get("intervalRegularity")) > 0.95:
-            score += 0.25
-            flags.append("machine_like_timing")
-        
-        if _safe_float(features.get("midnightActivityRatio")) > 0.5:
-            score += 0.15
-            flags.append("nocturnal_activity")
-        
-        if _safe_float(features.get("maxInactivityGapHours")) < 2.0:
-            score += 0.10
-            flags.append("no_sleep_detected")
-        
-        # ── Interaction red flags ──
-        if _safe_float(features.get("fastReplyPct")) > 0.8:
-            score += 0.20
-            flags.append("superhuman_reply_speed")
-        
-        if _safe_float(features.get("avgTimeOnPost")) < 1.0:
-            score += 0.15
-            flags.append("impossible_read_speed")
-        
-        like_comment_ratio = _safe_float(features.get("likeCommentRatio"))
-        if like_comment_ratio > 10:
-            score += 0.15
-            flags.append("excessive_likes_no_comments")
-        
-        if _safe_float(features.get("copyPasteCommentPct")) > 0.5:
-            score += 0.20
-            flags.append("repetitive_comments")
-        
-        # ── Honeypot triggers (CRITICAL) ──
-        if _safe_float(features.get("invisibleInteractionCount")) > 0:
-            score += 0.30
-            flags.append("HONEYPOT_invisible_click")
-        
-        if _safe_float(features.get("cssHoneypotTriggers")) > 0:
-            score += 0.30
-            flags.append("HONEYPOT_css_hidden_interaction")
-        
-        if _safe_float(features.get("rapidFormFillCount")) > 2:
-            score += 0.25
-            flags.append("HONEYPOT_instant_form_fill")
-        
-        if _safe_float(features.get("mouseMovementEntropy")) < 0.1:
-            score += 0.20
-            flags.append("no_mouse_movement_variance")
-        
-        # ── Navigation patterns ──
-        if _safe_float(features.get("directNavigationPct")) > 0.9:
-            score += 0.10
-            flags.append("scripted_navigation")
-        
-        return min(1.0, score), flags
+        return self._eval(features)
+
+    def compute_scores_batch(self, rows: Iterable[Dict[str, Any] | None]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Branchless batch version of compute_score.
+        Returns (scores[N], flag_bits[N] as uint16); see decode_flags.
+        Rows that saturate stop collecting flags, as in compute_score.
+        """
+        rows = [f or {} for f in rows]
+        scores = np.zeros(len(rows), dtype=np.float64)
+        flag_bits = np.zeros(len(rows), dtype=np.uint16)
+
+        for bit, (key, op, threshold, weight, _) in enumerate(self.rules):
+            col = np.array([_safe_float(f.get(key)) for f in rows], dtype=np.float64)
+            hit = col > threshold if op == ">" else col < threshold
+            hit &= scores < 1.0
+            scores += weight * hit
+            flag_bits |= hit.astype(np.uint16) << bit
+
+        np.minimum(scores, 1.0, out=scores)
+        return scores, flag_bits
+
+    def decode_flags(self, flag_bits: int) -> List[str]:
+        """Expand a packed flag mask from compute_scores_batch into flag names."""
+        flag_bits = int(flag_bits)
+        return [rule[4] for bit, rule in enumerate(self.rules) if flag_bits >> bit & 1]
 
 
 # ==========================================
@@ -560,10 +1002,35 @@ class EnsembleBotDetector:
                 "recommendation": str,  # "allow" | "flag" | "block"
             }
         """
-        neural_score = self.neural.predict_proba(behavior_features)
-        logistic_score = self.logistic.predict_proba(behavior_features)
+        # Build the feature vector once; both models consume raw features
+        # through their folded first layers, so no per-model normalization.
+        x = behavior_features_to_vector(behavior_features).reshape(1, -1)
+        neural_score = float(self.neural.predict_proba_matrix(x)[0])
+        logistic_score = float(self.logistic.predict_proba_matrix(x)[0])
         rule_score, flags = self.rules.compute_score(behavior_features or {})
-        
+        return self._combine(neural_score, logistic_score, rule_score, flags, threshold)
+    
+    def predict_batch(self, behavior_features_list: Iterable[Dict[str, Any] | None],
+                      threshold: float = 0.5) -> List[Dict[str, Any]]:
+        """
+        predict() for many users at once: one feature matrix, one matmul per
+        model and the vectorized rule kernel. Results match predict() per row.
+        """
+        rows = [f or {} for f in behavior_features_list]
+        if not rows:
+            return []
+        X = behavior_features_batch_to_matrix(rows)
+        neural_scores = self.neural.predict_proba_matrix(X).tolist()
+        logistic_scores = self.logistic.predict_proba_matrix(X).tolist()
+        rule_scores, flag_bits = self.rules.compute_scores_batch(rows)
+        return [
+            self._combine(n, l, r, self.rules.decode_flags(bits), threshold)
+            for n, l, r, bits in zip(neural_scores, logistic_scores, rule_scores.tolist(), flag_bits.tolist())
+        ]
+    
+    def _combine(self, neural_score: float, logistic_score: float, rule_score: float,
+                 flags: List[str], threshold: float) -> Dict[str, Any]:
+        """Weighted vote, agreement confidence and recommendation for one user."""
         # Weighted ensemble
         final_score = (
             self.neural_weight * neural_score +
@@ -571,9 +1038,13 @@ class EnsembleBotDetector:
             self.rule_weight * rule_score
         )
         
-        # Confidence: models agree = high confidence
-        scores = [neural_score, logistic_score, rule_score]
-        confidence = 1.0 - float(np.std(scores))
+        # Confidence: models agree = high confidence (population std of the 3 scores)
+        mean = (neural_score + logistic_score + rule_score) / 3.0
+        confidence = 1.0 - math.sqrt((
+            (neural_score - mean) ** 2 +
+            (logistic_score - mean) ** 2 +
+            (rule_score - mean) ** 2
+        ) / 3.0)
         
         # Recommendation
         if final_score >= 0.85 and confidence >= 0.7:
@@ -598,9 +1069,21 @@ class EnsembleBotDetector:
         """Just return the probability (for compatibility)."""
         return self.predict(behavior_features)["bot_probability"]
     
-    def save(self, path: str | pathlib.Path) -> None:
-        """Save all models to JSON."""
+    def save(self, path: str | pathlib.Path, quantize: bool = False, bf16: bool = False) -> None:
+        """
+        Save all models. Paths ending in .json are written as JSON; anything
+        else as an uncompressed NPZ (arrays stored raw, scalars in "meta").
+        quantize=True writes the int8 deployment export (inference only);
+        bf16=True keeps the full model but stores weights as bfloat16.
+        """
+        if quantize and bf16:
+            raise ValueError("quantize and bf16 are mutually exclusive")
         p = pathlib.Path(path)
+        as_json = p.suffix.lower() == ".json"
+        if quantize:
+            export = lambda model: model.to_quantized_dict(arrays=not as_json)
+        else:
+            export = lambda model: model.to_dict(arrays=not as_json, bf16=bf16)
         payload = {
             "feature_keys": FEATURE_KEYS,
             "weights": {
@@ -608,16 +1091,34 @@ class EnsembleBotDetector:
                 "logistic": self.logistic_weight,
                 "rule": self.rule_weight,
             },
-            "neural": self.neural.to_dict(),
-            "logistic": self.logistic.to_dict(),
+            "neural": export(self.neural),
+            "logistic": export(self.logistic),
         }
-        p.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        if as_json:
+            p.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            return
+
+        arrays: Dict[str, np.ndarray] = {}
+        for name in ("neural", "logistic"):
+            for key, value in list(payload[name].items()):
+                if isinstance(value, np.ndarray):
+                    arrays[f"{name}.{key}"] = payload[name].pop(key)
+        with p.open("wb") as fh:
+            np.savez(fh, meta=np.array(json.dumps(payload)), **arrays)
     
     @classmethod
     def load(cls, path: str | pathlib.Path) -> "EnsembleBotDetector":
-        """Load all models from JSON."""
+        """Load all models from a file written by save (JSON or NPZ)."""
         p = pathlib.Path(path)
-        data = json.loads(p.read_text(encoding="utf-8"))
+        if p.suffix.lower() == ".json":
+            data = json.loads(p.read_text(encoding="utf-8"))
+        else:
+            with np.load(p, allow_pickle=False) as npz:
+                data = json.loads(str(npz["meta"]))
+                for member in npz.files:
+                    if member != "meta":
+                        name, key = member.split(".", 1)
+                        data[name][key] = npz[member]
         
         weights = data.get("weights", {})
         ensemble = cls(
@@ -636,6 +1137,25 @@ class EnsembleBotDetector:
 # TRAINING DATA UTILITIES
 # ==========================================
 
+# Rows converted per batch while streaming a training set.
+_INGEST_CHUNK = 4096
+
+
+def _row_label(row: Dict[str, Any]) -> float | None:
+    """Resolve a training row's label: label, then isBot, then account_type."""
+    label = row.get("label", None)
+    if label is None:
+        if isinstance(row.get("isBot"), bool):
+            label = 1 if row["isBot"] else 0
+        else:
+            account_type = str(row.get("account_type", "")).lower()
+            if account_type == "bot":
+                label = 1
+            elif account_type == "human":
+                label = 0
+    return None if label is None else float(label)
+
+
 def build_training_dataset(rows: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
     """
     Convert training rows to (X, y) arrays.
@@ -644,31 +1164,45 @@ def build_training_dataset(rows: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray,
     - behaviorFeatures (dict) and/or botScore (number)
     - label (0/1) OR account_type in {"human","bot"} OR isBot boolean
     """
-    X: List[np.ndarray] = []
-    y: List[float] = []
-
-    for row in rows:
-        label = row.get("label", None)
-        if label is None:
-            if isinstance(row.get("isBot"), bool):
-                label = 1 if row["isBot"] else 0
-            else:
-                account_type = str(row.get("account_type", "")).lower()
-                if account_type == "bot":
-                    label = 1
-                elif account_type == "human":
-                    label = 0
-        if label is None:
-            continue
-
-        behavior = dict(row.get("behaviorFeatures") or {})
-        behavior.setdefault("botScore", row.get("botScore", 0.0))
-        X.append(behavior_features_to_vector(behavior))
-        y.append(float(label))
-
-    if not X:
-        return np.empty((0, len(FEATURE_KEYS)), dtype=np.float32), np.empty((0,), dtype=np.float32)
-    return np.vstack(X), np.array(y, dtype=np.float32)
+    it = iter(rows)
+    d = len(FEATURE_KEYS)
+    X = np.empty((_INGEST_CHUNK, d), dtype=np.float32)
+    y = np.empty(_INGEST_CHUNK, dtype=np.float32)
+    n = 0
+
+    # Consume rows in bounded chunks (rows may be a DB cursor) and write
+    # each chunk straight into a geometrically grown output buffer.
+    while True:
+        chunk = list(itertools.islice(it, _INGEST_CHUNK))
+        if not chunk:
+            break
+        labels = [_row_label(row) for row in chunk]
+        if None in labels:
+            kept = [row for row, label in zip(chunk, labels) if label is not None]
+            labels = [label for label in labels if label is not None]
+        else:
+            kept = chunk
+        m = len(kept)
+        if n + m > X.shape[0]:
+            capacity = max(2 * X.shape[0], n + m)
+            X.resize((capacity, d), refcheck=False)
+            y.resize(capacity, refcheck=False)
+
+        behaviors = [row.get("behaviorFeatures") or {} for row in kept]
+        behavior_features_batch_to_matrix(behaviors, out=X[n:n + m])
+        y[n:n + m] = np.fromiter(labels, dtype=np.float32, count=m)
+
+        # Rows whose behaviorFeatures lack botScore fall back to the top-level one.
+        fallback = [i for i, behavior in enumerate(behaviors) if "botScore" not in behavior]
+        if fallback:
+            X[[n + i for i in fallback], KEY_COL["botScore"]] = [
+                _safe_float(kept[i].get("botScore", 0.0)) for i in fallback
+            ]
+        n += m
+
+    X.resize((n, d), refcheck=False)
+    y.resize(n, refcheck=False)
+    return X, y
 
 
 def build_balanced_dataset(rows: Iterable[Dict[str, Any]], 
@@ -688,31 +1222,22 @@ def build_balanced_dataset(rows: Iterable[Dict[str, Any]],
     if n_bots == 0 or n_humans == 0:
         return X, y
     
-    # Oversample minority class
-    if n_bots < n_humans:
-        bot_indices = np.where(y == 1)[0]
-        n_synthetic = n_humans - n_bots
-        
-        synthetic_X = []
-        for _ in range(n_synthetic):
-            idx = np.random.choice(bot_indices)
-            noise = np.random.normal(0, 0.05, X.shape[1])
-            synthetic_X.append(X[idx] + noise)
-        
-        X = np.vstack([X, np.array(synthetic_X)])
-        y = np.concatenate([y, np.ones(n_synthetic)])
-    else:
-        human_indices = np.where(y == 0)[0]
-        n_synthetic = n_bots - n_humans
-        
-        synthetic_X = []
-        for _ in range(n_synthetic):
-            idx = np.random.choice(human_indices)
-            noise = np.random.normal(0, 0.05, X.shape[1])
-            synthetic_X.append(X[idx] + noise)
-        
-        X = np.vstack([X, np.array(synthetic_X)])
-        y = np.concatenate([y, np.zeros(n_synthetic)])
+    # Oversample minority class: draw every source row and noise vector at once
+    minority = 1.0 if n_bots < n_humans else 0.0
+    minority_indices = np.flatnonzero(y == minority)
+    n_synthetic = abs(n_humans - n_bots)
+    n, d = X.shape
+
+    chosen = minority_indices[np.random.randint(0, minority_indices.size, size=n_synthetic)]
+    noise = np.random.normal(0, 0.05, (n_synthetic, d)).astype(np.float32)
+
+    X_out = np.empty((n + n_synthetic, d), dtype=np.float32)
+    X_out[:n] = X
+    np.add(X[chosen], noise, out=X_out[n:])
+    y_out = np.empty(n + n_synthetic, dtype=np.float32)
+    y_out[:n] = y
+    y_out[n:] = minority
+    X, y = X_out, y_out
     
     # Shuffle
     indices = np.random.permutation(len(y))
@@ -736,15 +1261,14 @@ def evaluate_model(model: Any, X_test: np.ndarray, y_test: np.ndarray) -> Dict[s
     else:
         probs = np.array([model.predict_proba(None) for _ in range(len(X_test))])
     
-    preds = (probs >= 0.5).astype(int)
+    preds = (probs >= 0.5).astype(np.uint8)
     
-    # Confusion matrix
-    tp = ((preds == 1) & (y_test == 1)).sum()
-    fp = ((preds == 1) & (y_test == 0)).sum()
-    tn = ((preds == 0) & (y_test == 0)).sum()
-    fn = ((preds == 0) & (y_test == 1)).sum()
+    # Confusion matrix in one pass: code = 2*pred + label
+    code = preds << 1
+    code |= (y_test == 1).astype(np.uint8)
+    tn, fn, fp, tp = np.bincount(code, minlength=4)
     
-    accuracy = (preds == y_test).mean()
+    accuracy = (tp + tn) / len(code) if len(code) else 0.0
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0
     recall = tp / (tp + fn) if (tp + fn) > 0 else 0
     f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
@@ -815,8 +1339,8 @@ if __name__ == "__main__":
     print(f"  Logistic: acc={metrics['logistic']['accuracy']:.3f}")
     
     # Save model
-    detector.save("bot_detector_model.json")
-    print("\nModel saved to bot_detector_model.json")
+    detector.save("bot_detector_model.npz")
+    print("\nModel saved to bot_detector_model.npz")
     
     # Test prediction
     test_behavior = {
@@ -7,7 +7,8 @@ FastAPI service exposing:
   GET  /health       — liveness check
 
 User identity: username string (no auth required yet).
-Persistence:   NCF model weights saved to MongoDB as base64 numpy arrays.
+Persistence:   NCF embeddings saved to MongoDB as one NPZ blob (bson.Binary),
+               with user_index/post_index giving the row order.
 """
 
 import numpy as np
@@ -19,9 +20,11 @@ import os
 import logging
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from fastapi import FastAPI
+from bson import Binary
 from pydantic import BaseModel
 from pymongo import MongoClient
 
@@ -60,6 +63,8 @@ SERENDIPITY_RATIO   = 0.10
 TAG_DECAY_FACTOR    = 0.5
 DIVERSITY_THRESHOLD = 0.72
 TAG_COHESION_BOOST = 0.12
+EMB_POOL_SIZE       = 1024   # new embeddings drawn per np.random.randn call
+JACCARD_BLOCK_ROWS  = 256    # candidate rows per pairwise bitset Jaccard block
 
 INTERACTION_WEIGHTS = {
     "like":    1.0,
@@ -89,33 +94,89 @@ class LoomNCF:
         self.reg = reg
         self.user_embeddings: Dict[str, np.ndarray] = {}
         self.post_embeddings: Dict[str, np.ndarray] = {}
-        self.W1 = np.random.randn(embedding_dim * 2, embedding_dim) * 0.01
-        self.b1 = np.zeros(embedding_dim)
-        self.W2 = np.random.randn(embedding_dim, 1) * 0.01
-        self.b2 = np.zeros(1)
+        # float32 throughout: half the bytes per pass and per stored embedding.
+        self.W1 = (np.random.randn(embedding_dim * 2, embedding_dim) * 0.01).astype(np.float32)
+        self.b1 = np.zeros(embedding_dim, dtype=np.float32)
+        self.W2 = (np.random.randn(embedding_dim, 1) * 0.01).astype(np.float32)
+        self.b2 = np.zeros(1, dtype=np.float32)
         self.user_interaction_counts: Dict[str, int] = defaultdict(int)
+        # Pool for new embeddings; drawn on first use (see _new_emb).
+        self._emb_pool = np.empty((0, embedding_dim), dtype=np.float32)
+        self._emb_pool_next = 0
+        # Scratch for _forward/update; one (user, post) pair is live at a time.
+        d = embedding_dim
+        self._buf = {
+            "x":      np.empty(d * 2, dtype=np.float32),
+            "h1":     np.empty(d, dtype=np.float32),
+            "d_tanh": np.empty(d, dtype=np.float32),
+            "d_x":    np.empty(d * 2, dtype=np.float32),
+            "d_x_lr": np.empty(d * 2, dtype=np.float32),
+            "tmp":    np.empty(d, dtype=np.float32),
+            "d_W1":   np.empty((d * 2, d), dtype=np.float32),
+            "d_W2":   np.empty((d, 1), dtype=np.float32),
+        }
+
+    def _new_emb(self) -> np.ndarray:
+        """
+        Fresh N(0, 0.01^2) embedding: a row of a pool drawn EMB_POOL_SIZE at
+        a time. Rows are handed out as views, so the pool is the embeddings'
+        storage rather than a staging copy.
+        """
+        if self._emb_pool_next >= len(self._emb_pool):
+            self._emb_pool = (np.random.randn(EMB_POOL_SIZE, self.embedding_dim) * 0.01).astype(np.float32)
+            self._emb_pool_next = 0
+        emb = self._emb_pool[self._emb_pool_next]
+        self._emb_pool_next += 1
+        return emb
 
     def _get_user_emb(self, uid: str) -> np.ndarray:
-        if uid not in self.user_embeddings:
-            self.user_embeddings[uid] = np.random.randn(self.embedding_dim) * 0.01
-        return self.user_embeddings[uid]
+        emb = self.user_embeddings.get(uid)
+        if emb is None:
+            emb = self.user_embeddings[uid] = self._new_emb()
+        return emb
 
     def _get_post_emb(self, pid: str) -> np.ndarray:
-        if pid not in self.post_embeddings:
-            self.post_embeddings[pid] = np.random.randn(self.embedding_dim) * 0.01
-        return self.post_embeddings[pid]
+        emb = self.post_embeddings.get(pid)
+        if emb is None:
+            emb = self.post_embeddings[pid] = self._new_emb()
+        return emb
 
     def _forward(self, user_emb, post_emb):
-        x  = np.concatenate([user_emb, post_emb])
-        h1 = np.tanh(x @ self.W1 + self.b1)
-        out = h1 @ self.W2 + self.b2
-        score = 1 / (1 + np.exp(-out[0]))
+        """Returns (score, h1, x); h1 and x are scratch buffers, valid until the next call."""
+        d  = self.embedding_dim
+        x  = self._buf["x"]
+        h1 = self._buf["h1"]
+        x[:d] = user_emb
+        x[d:] = post_emb
+        np.dot(x, self.W1, out=h1)
+        h1 += self.b1
+        np.tanh(h1, out=h1)
+        out = float(h1 @ self.W2[:, 0]) + float(self.b2[0])
+        # sigmoid via tanh: no overflow for large |out|, and plain float math
+        score = 0.5 * (1.0 + math.tanh(0.5 * out))
         return score, h1, x
 
     def predict(self, user_id: str, post_id: str) -> float:
         score, _, _ = self._forward(self._get_user_emb(user_id), self._get_post_emb(post_id))
         return float(score)
 
+    def predict_batch(self, user_id: str, post_ids: List[str]) -> np.ndarray:
+        """
+        predict() for many posts at once. W1 is [W1_user; W1_post], so the
+        user half of layer 1 is one gemv shared by every row and only the
+        (K, D) @ (D, D) post half is batched.
+        """
+        d = self.embedding_dim
+        user_pre = self._get_user_emb(user_id) @ self.W1[:d] + self.b1
+        P = np.empty((len(post_ids), d), dtype=np.float32)
+        for i, pid in enumerate(post_ids):
+            P[i] = self._get_post_emb(pid)
+        H = P @ self.W1[d:]
+        H += user_pre
+        np.tanh(H, out=H)
+        out = H @ self.W2[:, 0] + self.b2[0]
+        return 0.5 * (1.0 + np.tanh(0.5 * out))
+
     def update(self, user_id: str, post_id: str, interaction_type: str,
                negative_post_ids: Optional[List[str]] = None):
         label    = INTERACTION_WEIGHTS.get(interaction_type, 1.0)
@@ -126,30 +187,43 @@ class LoomNCF:
         err  = label - pos_score
         d_out = err * pos_score * (1 - pos_score)
 
-        d_W2   = np.outer(h1, [d_out])
-        d_b2   = np.array([d_out])
-        d_h1   = (self.W2 * d_out).flatten()
-        d_tanh = (1 - h1 ** 2) * d_h1
-        d_W1   = np.outer(x, d_tanh)
-        d_b1   = d_tanh
-        d_x    = d_tanh @ self.W1.T
-        d_user = d_x[:self.embedding_dim]
-        d_post = d_x[self.embedding_dim:]
-
-        self.W2     += self.lr * (d_W2   - self.reg * self.W2)
-        self.b2     += self.lr * d_b2
-        self.W1     += self.lr * (d_W1   - self.reg * self.W1)
-        self.b1     += self.lr * d_b1
-        user_emb    += self.lr * (d_user - self.reg * user_emb)
-        post_emb    += self.lr * (d_post - self.reg * post_emb)
+        # Backward pass, all into preallocated buffers (no np.outer temporaries).
+        # Every gradient is taken before any parameter moves; lr is folded
+        # into the small vectors so each matrix update is one multiply + add.
+        d      = self.embedding_dim
+        lr     = self.lr
+        buf    = self._buf
+        tmp    = buf["tmp"]
+        d_tanh = np.multiply(self.W2[:, 0], d_out, out=buf["d_tanh"])     # d_h1
+        np.multiply(h1, h1, out=tmp)
+        np.subtract(1.0, tmp, out=tmp)
+        d_tanh *= tmp
+        d_x    = np.dot(self.W1, d_tanh, out=buf["d_x"])
+        d_post = d_x[d:]
+
+        # p += lr * (grad - reg * p)  ==  p *= 1 - lr*reg; p += lr * grad
+        decay = 1.0 - lr * self.reg
+        self.W2 *= decay
+        self.W2 += np.multiply(h1[:, None], lr * d_out, out=buf["d_W2"])
+        self.b2 += lr * d_out
+        d_tanh *= lr
+        self.W1 *= decay
+        self.W1 += np.multiply(x[:, None], d_tanh[None, :], out=buf["d_W1"])
+        self.b1 += d_tanh
+        # x still holds [user_emb, post_emb]: update both halves in one go.
+        x *= decay
+        x += np.multiply(d_x, lr, out=buf["d_x_lr"])
+        user_emb[:] = x[:d]
+        post_emb[:] = x[d:]
 
         if negative_post_ids:
             neg_id  = random.choice(negative_post_ids)
             neg_emb = self._get_post_emb(neg_id)
             neg_score, _, _ = self._forward(user_emb, neg_emb)
-            bpr_grad = -1 / (1 + np.exp(pos_score - neg_score))
-            post_emb += self.lr * (-bpr_grad * d_post)
-            neg_emb  -= self.lr * (-bpr_grad * d_post)
+            bpr_grad = -1 / (1 + math.exp(pos_score - neg_score))
+            np.multiply(d_post, lr * -bpr_grad, out=tmp)
+            post_emb += tmp
+            neg_emb  -= tmp
 
         self.user_interaction_counts[user_id] = \
             self.user_interaction_counts.get(user_id, 0) + 1
@@ -163,29 +237,48 @@ class LoomNCF:
 
     # ---- Persistence ----
     def to_dict(self) -> dict:
-        def enc(arr):
-            buf = io.BytesIO(); np.save(buf, arr)
-            return base64.b64encode(buf.getvalue()).decode()
+        """
+        All arrays go into one NPZ blob (embeddings stacked into U/P
+        matrices); row order is given by user_index/post_index.
+        """
+        d = self.embedding_dim
+        user_index = list(self.user_embeddings)
+        post_index = list(self.post_embeddings)
+        U = np.stack([self.user_embeddings[k] for k in user_index]) if user_index else np.empty((0, d), dtype=np.float32)
+        P = np.stack([self.post_embeddings[k] for k in post_index]) if post_index else np.empty((0, d), dtype=np.float32)
+        buf = io.BytesIO()
+        np.savez(buf, W1=self.W1, b1=self.b1, W2=self.W2, b2=self.b2, U=U, P=P)
         return {
             "embedding_dim": self.embedding_dim,
             "lr": self.lr, "reg": self.reg,
-            "W1": enc(self.W1), "b1": enc(self.b1),
-            "W2": enc(self.W2), "b2": enc(self.b2),
-            "user_embeddings": {k: enc(v) for k, v in self.user_embeddings.items()},
-            "post_embeddings": {k: enc(v) for k, v in self.post_embeddings.items()},
+            "blob": Binary(buf.getvalue()),
+            "user_index": user_index,
+            "post_index": post_index,
             "user_interaction_counts": dict(self.user_interaction_counts),
             "saved_at": datetime.utcnow().isoformat(),
         }
 
     @classmethod
     def from_dict(cls, data: dict):
-        def dec(s):
-            buf = io.BytesIO(base64.b64decode(s)); return np.load(buf, allow_pickle=False)
+        # Older saves hold float64 arrays; everything is float32 in memory.
+        def f32(a):
+            return np.asarray(a, dtype=np.float32)
         m = cls(data["embedding_dim"], data["lr"], data["reg"])
-        m.W1 = dec(data["W1"]); m.b1 = dec(data["b1"])
-        m.W2 = dec(data["W2"]); m.b2 = dec(data["b2"])
-        m.user_embeddings = {k: dec(v) for k, v in data["user_embeddings"].items()}
-        m.post_embeddings = {k: dec(v) for k, v in data["post_embeddings"].items()}
+        if "blob" in data:
+            with np.load(io.BytesIO(bytes(data["blob"])), allow_pickle=False) as npz:
+                m.W1 = f32(npz["W1"]); m.b1 = f32(npz["b1"])
+                m.W2 = f32(npz["W2"]); m.b2 = f32(npz["b2"])
+                U, P = f32(npz["U"]), f32(npz["P"])
+            m.user_embeddings = dict(zip(data["user_index"], U))
+            m.post_embeddings = dict(zip(data["post_index"], P))
+        else:
+            # Legacy documents: one base64 np.save payload per array.
+            def dec(s):
+                buf = io.BytesIO(base64.b64decode(s)); return f32(np.load(buf, allow_pickle=False))
+            m.W1 = dec(data["W1"]); m.b1 = dec(data["b1"])
+            m.W2 = dec(data["W2"]); m.b2 = dec(data["b2"])
+            m.user_embeddings = {k: dec(v) for k, v in data["user_embeddings"].items()}
+            m.post_embeddings = {k: dec(v) for k, v in data["post_embeddings"].items()}
         m.user_interaction_counts = defaultdict(
             int, data.get("user_interaction_counts", {}))
         return m
@@ -203,9 +296,10 @@ def save_model():
     if db is None:
         return
     try:
-        db["ncf_model"].update_one(
+        # Replace the whole document so fields from older formats don't linger.
+        db["ncf_model"].replace_one(
             {"_id": "loom_ncf_v1"},
-            {"$set": _model.to_dict()},
+            _model.to_dict(),
             upsert=True,
         )
         logger.info("[NCF] Model saved to MongoDB")
@@ -286,15 +380,17 @@ def compute_tag_score(post_tags: dict, user_affinity: dict,
     return round(score, 4)
 
 
-def compute_hybrid_score(user_id: Optional[str], post: dict,
-                         user_affinity: dict, seen_tag_counts: dict,
-                         exploration: float = 0.10,
-                         followed_artist_ids: Optional[set] = None,
-                         creator_behavior_stats: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
+def _hybrid_context(user_id: Optional[str], post: dict,
+                    followed_artist_ids: Optional[set] = None,
+                    creator_behavior_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+                    ncf_score: Optional[float] = None,
+                    ncf_alpha: Optional[float] = None) -> tuple:
+    """
+    Everything compute_hybrid_score needs besides the tag score:
+    (followed_boost, behavior_factor, alpha, ncf_score).
+    """
     post_id   = str(post.get("_id", ""))
     artist_id = str(post.get("artistId", ""))
-    post_tags = post.get("mlTags") or {}
-    tag_score = compute_tag_score(post_tags, user_affinity, seen_tag_counts, exploration)
 
     # Keep recommendation complexity intact; this is a small additive preference.
     followed_boost = (
@@ -341,90 +437,371 @@ def compute_hybrid_score(user_id: Optional[str], post: dict,
     behavior_factor = min(1.0, max(1.0 - MAX_BEHAVIOR_PENALTY, behavior_factor))
 
     if not user_id or not post_id:
-        return round(min(1.0, (tag_score + followed_boost) * behavior_factor), 4)
+        return followed_boost, behavior_factor, 0.0, 0.0
 
-    alpha = _model.ncf_weight(user_id)
+    alpha = _model.ncf_weight(user_id) if ncf_alpha is None else ncf_alpha
     if alpha == 0.0:
-        return round(min(1.0, (tag_score + followed_boost) * behavior_factor), 4)
+        return followed_boost, behavior_factor, 0.0, 0.0
 
-    ncf_score = _model.predict(user_id, post_id)
+    if ncf_score is None:
+        ncf_score = _model.predict(user_id, post_id)
+    return followed_boost, behavior_factor, alpha, ncf_score
+
+
+def _blend_hybrid(tag_score: float, context: tuple) -> float:
+    followed_boost, behavior_factor, alpha, ncf_score = context
+    if alpha == 0.0:
+        return round(min(1.0, (tag_score + followed_boost) * behavior_factor), 4)
     base = alpha * ncf_score + (1 - alpha) * tag_score
     return round(min(1.0, (base + followed_boost) * behavior_factor), 4)
 
 
+def _blend_hybrid_batch(tag_scores: np.ndarray, contexts: np.ndarray) -> np.ndarray:
+    """_blend_hybrid over rows of _hybrid_context tuples (alpha 0 gives the tag-only blend)."""
+    followed_boost, behavior_factor, alpha, ncf_score = contexts.T
+    base = alpha * ncf_score + (1 - alpha) * tag_scores
+    return np.round(np.minimum(1.0, (base + followed_boost) * behavior_factor), 4)
+
+
+def compute_hybrid_score(user_id: Optional[str], post: dict,
+                         user_affinity: dict, seen_tag_counts: dict,
+                         exploration: float = 0.10,
+                         followed_artist_ids: Optional[set] = None,
+                         creator_behavior_stats: Optional[Dict[str, Dict[str, Any]]] = None,
+                         ncf_score: Optional[float] = None,
+                         ncf_alpha: Optional[float] = None) -> float:
+    post_tags = post.get("mlTags") or {}
+    tag_score = compute_tag_score(post_tags, user_affinity, seen_tag_counts, exploration)
+    context = _hybrid_context(user_id, post, followed_artist_ids, creator_behavior_stats,
+                              ncf_score, ncf_alpha)
+    return _blend_hybrid(tag_score, context)
+
+
+# ==========================================
+# VECTORIZED TAG SCORING
+# ==========================================
+# Exploration noise for compute_tag_scores (PCG64, drawn per batch).
+_RNG = np.random.default_rng()
+
+
+class TagIndex(NamedTuple):
+    """
+    Tags of a request's candidate posts, rows in post order.
+
+    Scoring: one sparse entry per tag in a weighted category, in row order
+    (tag_rows), with its (category, label) column (tag_cols), its weight
+    CATEGORY_WEIGHTS[category] / len(tags) (tag_weight) and that times its
+    confidence (tag_conf). A post's compute_tag_score is the sum over its
+    entries of tag_conf * mul[col] + tag_weight * add[col], with per-column
+    vectors from tag_score_vectors.
+
+    Diversity: labels (every category) are interned to ids. `bits` holds
+    each post's label set as uint64 bitset words; label_ids[label_ptr[i]:
+    label_ptr[i + 1]] are post i's label ids with repeats, for seen counts.
+    """
+    tag_rows: np.ndarray
+    tag_cols: np.ndarray
+    tag_conf: np.ndarray
+    tag_weight: np.ndarray
+    col_of: Dict[Tuple[str, Any], int]   # (category, label) -> column
+    col_label: np.ndarray        # label id per column, len(labels) if never labelled
+    labels: Dict[Any, int]
+    bits: np.ndarray
+    label_ptr: np.ndarray
+    label_ids: np.ndarray
+    row_of: Dict[int, int]       # id(post) -> row
+
+
+def build_tag_index(posts: List[dict]) -> TagIndex:
+    col_of: Dict[Tuple[str, Any], int] = {}
+    labels: Dict[Any, int] = {}
+    rows, cols, confs, scales = [], [], [], []
+    label_rows, label_ids = [], []
+    for i, post in enumerate(posts):
+        post_tags = post.get("mlTags") or {}
+        if not isinstance(post_tags, dict):
+            continue
+        for category, tags in post_tags.items():
+            if not isinstance(tags, list) or not tags:
+                continue
+            cat_weight = CATEGORY_WEIGHTS.get(category, 0.0)
+            scale = cat_weight / len(tags)
+            for tag in tags:
+                if not isinstance(tag, dict):
+                    continue
+                if "label" in tag:
+                    label_rows.append(i)
+                    label_ids.append(labels.setdefault(tag["label"], len(labels)))
+                if cat_weight:
+                    key = (category, tag.get("label", ""))
+                    rows.append(i)
+                    cols.append(col_of.setdefault(key, len(col_of)))
+                    confs.append(tag.get("confidence", 0.5))
+                    scales.append(scale)
+
+    n_posts = len(posts)
+    tag_weight = np.asarray(scales, dtype=np.float32)
+    tag_conf = np.multiply(confs, scales, dtype=np.float32)
+    col_label = np.fromiter((labels.get(label, len(labels)) for _, label in col_of),
+                            dtype=np.intp, count=len(col_of))
+
+    label_rows = np.asarray(label_rows, dtype=np.intp)
+    label_ids = np.asarray(label_ids, dtype=np.intp)
+    label_ptr = np.zeros(n_posts + 1, dtype=np.intp)
+    np.cumsum(np.bincount(label_rows, minlength=n_posts), out=label_ptr[1:])
+    bits = np.zeros((n_posts, max(1, (len(labels) + 63) // 64)), dtype=np.uint64)
+    np.bitwise_or.at(bits, (label_rows, label_ids >> 6),
+                     np.left_shift(np.uint64(1), (label_ids & 63).astype(np.uint64)))
+
+    return TagIndex(np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp),
+                    tag_conf, tag_weight, col_of, col_label, labels, bits,
+                    label_ptr, label_ids, {id(p): i for i, p in enumerate(posts)})
+
+
+def tag_score_vectors(index: TagIndex, user_affinity: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-column (mul, add): an undecayed tag's term in compute_tag_score is
+    conf * mul + add.
+    """
+    n = len(index.col_of)
+    # Defaults are for labels the user has no affinity entry for (novel);
+    # only the user's own (usually far fewer) entries are looked up.
+    mul = np.full(n, 0.6, dtype=np.float32)
+    add = np.full(n, 0.08, dtype=np.float32)
+    col_of = index.col_of
+    for category, cat_affinity in user_affinity.items():
+        for label, aff in cat_affinity.items():
+            j = col_of.get((category, label))
+            if j is not None:
+                mul[j] = 0.6 + 0.4 * aff
+                add[j] = 0.0
+    return mul, add
+
+
+def tag_score_terms(index: TagIndex, user_affinity: dict) -> np.ndarray:
+    """Undecayed, category-weighted term of every index entry (float32)."""
+    mul, add = tag_score_vectors(index, user_affinity)
+    cols = index.tag_cols
+    terms = index.tag_conf * mul[cols]
+    terms += index.tag_weight * add[cols]
+    return terms
+
+
+def _tag_base_scores(index: TagIndex, terms: np.ndarray) -> np.ndarray:
+    """Per-post undecayed tag score before exploration noise, in float64."""
+    return np.bincount(index.tag_rows, weights=terms,
+                       minlength=len(index.bits)).astype(np.float64, copy=False)
+
+
+def _decay_correction(index: TagIndex, terms: np.ndarray, seen_vec: np.ndarray) -> np.ndarray:
+    """
+    What tag decay by `seen_vec` (counts per label id) takes off each
+    post's base score: terms * (1 - decay), summed per post. Linear in the
+    terms, so the second pass needn't rebuild them.
+    """
+    # The trailing 0 is the count for columns whose label is never seen.
+    times = np.append(seen_vec, 0)[index.col_label]
+    loss = 1.0 - np.power(TAG_DECAY_FACTOR, times, dtype=np.float32)
+    return np.bincount(index.tag_rows, weights=terms * loss[index.tag_cols],
+                       minlength=len(index.bits))
+
+
+def _explore(scores: np.ndarray, exploration: float) -> np.ndarray:
+    """Adds one batch of exploration noise and rounds to 4 decimals, in place."""
+    scores += _RNG.uniform(0.0, exploration, size=len(scores))
+    return np.round(scores, 4, out=scores)
+
+
+def compute_tag_scores(index: TagIndex, user_affinity: dict,
+                       seen_vec: Optional[np.ndarray] = None,
+                       exploration: float = 0.10,
+                       rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    compute_tag_score for the indexed posts (or just `rows` of them), in
+    order, with the exploration noise drawn in one batch.
+    """
+    terms = tag_score_terms(index, user_affinity)
+    scores = _tag_base_scores(index, terms)
+    if seen_vec is not None:
+        scores -= _decay_correction(index, terms, seen_vec)
+    if rows is not None:
+        scores = scores[rows]
+    return _explore(scores, exploration)
+
+
 # ==========================================
 # DIVERSITY & SERENDIPITY
 # ==========================================
+def _tag_labels(tags: Any) -> frozenset:
+    if isinstance(tags, dict):
+        return frozenset(tag["label"] for v in tags.values()
+                         if isinstance(v, list)
+                         for tag in v if isinstance(tag, dict) and "label" in tag)
+    return frozenset()
+
+
 def tag_similarity(tags_a: Any, tags_b: Any) -> float:
-    def labels(t):
-        if isinstance(t, dict):
-            return set(tag["label"] for v in t.values()
-                       if isinstance(v, list)
-                       for tag in v if isinstance(tag, dict) and "label" in tag)
-        return set()
-    a, b = labels(tags_a), labels(tags_b)
+    a, b = _tag_labels(tags_a), _tag_labels(tags_b)
     if not a or not b:
         return 0.0
     return len(a & b) / len(a | b)
 
 
-def assemble_feed(scored: List[dict], n: int) -> tuple:
-    sorted_posts = sorted(scored, key=lambda x: x.get("score", 0), reverse=True)
-    feed, seen_tag_counts = [], defaultdict(int)
-    for post in sorted_posts:
-        if len(feed) >= n:
+def _jaccard_bits(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Jaccard similarity of bitset rows, broadcast over the leading axes;
+    0 when either set is empty.
+    """
+    inter = np.bitwise_count(a & b).sum(axis=-1, dtype=np.int64)
+    union = np.bitwise_count(a | b).sum(axis=-1, dtype=np.int64)
+    return np.divide(inter, union, out=np.zeros(inter.shape), where=union > 0)
+
+
+def _pairwise_jaccard(a: np.ndarray, b: np.ndarray, block: int = JACCARD_BLOCK_ROWS) -> np.ndarray:
+    """
+    (len(a), len(b)) Jaccard matrix of two bitset matrices, computed in row
+    blocks of `a` so the uint64 temporaries stay block * len(b) * words.
+    """
+    out = np.empty((len(a), len(b)))
+    for start in range(0, len(a), block):
+        out[start:start + block] = _jaccard_bits(a[start:start + block, None, :], b[None, :, :])
+    return out
+
+
+def _index_rows(index: TagIndex, posts: List[dict]) -> np.ndarray:
+    return np.fromiter((index.row_of[id(p)] for p in posts), dtype=np.intp, count=len(posts))
+
+
+def _post_scores(posts: List[dict]) -> np.ndarray:
+    return np.fromiter((p.get("score", 0) for p in posts), dtype=np.float64, count=len(posts))
+
+
+def _top_order(values: np.ndarray, m: int):
+    """
+    Yield indices of `values` in descending order, ties in index order (same
+    as a stable reverse sort). Only the top ~m are selected and sorted up
+    front; the rest are sorted only if the caller keeps consuming.
+    """
+    k = len(values)
+    m = min(max(m, 1), k)
+    if m < k:
+        kth = np.partition(values, k - m)[k - m]
+        head = np.flatnonzero(values >= kth)
+    else:
+        head = np.arange(k)
+    yield from head[np.argsort(-values[head], kind="stable")].tolist()
+    if len(head) < k:
+        tail = np.flatnonzero(values < kth)
+        yield from tail[np.argsort(-values[tail], kind="stable")].tolist()
+
+
+# The helpers below work on index rows: `rows` are the candidates' rows in
+# the TagIndex and `scores` their scores, aligned with `rows`. Results are
+# positions into `rows`. The post-list functions further down wrap them.
+def _assemble_feed_rows(index: TagIndex, rows: np.ndarray, scores: np.ndarray,
+                        n: int) -> Tuple[List[int], np.ndarray]:
+    picked: List[int] = []
+    feed_bits = np.empty((max(n, 0), index.bits.shape[1]), dtype=np.uint64)
+    ranked = _top_order(scores, 3 * n)
+    # Candidates are taken in blocks of 3n ranked posts (diversity skips
+    # mean the feed usually fills from the first block). best_sim holds each
+    # block candidate's max similarity to the feed, raised as posts are
+    # accepted, so a candidate is checked with one comparison.
+    while len(picked) < n:
+        block = list(islice(ranked, 3 * n))
+        if not block:
             break
-        tags = post.get("mlTags") or {}
-        too_similar = any(
-            tag_similarity(tags, fp.get("mlTags") or {}) > DIVERSITY_THRESHOLD
-            for fp in feed
-        )
-        if too_similar:
-            continue
-        feed.append(post)
-        if isinstance(tags, dict):
-            for tag_list in tags.values():
-                if isinstance(tag_list, list):
-                    for tag in tag_list:
-                        if isinstance(tag, dict) and "label" in tag:
-                            seen_tag_counts[tag["label"]] += 1
-    return feed, seen_tag_counts
+        bits = index.bits[rows[block]]
+        if picked:
+            best_sim = _pairwise_jaccard(bits, feed_bits[:len(picked)]).max(axis=1)
+        else:
+            best_sim = np.zeros(len(block))
+        for j, i in enumerate(block):
+            if len(picked) >= n:
+                break
+            if best_sim[j] > DIVERSITY_THRESHOLD:
+                continue
+            feed_bits[len(picked)] = bits[j]
+            picked.append(i)
+            np.maximum(best_sim, _jaccard_bits(bits, bits[j]), out=best_sim)
+
+    ptr, label_ids = index.label_ptr, index.label_ids
+    seen = [label_ids[ptr[r]:ptr[r + 1]] for r in rows[picked].tolist()]
+    seen_vec = np.bincount(np.concatenate(seen) if seen else label_ids[:0],
+                           minlength=len(index.labels)).astype(np.int32)
+    return picked, seen_vec
+
+
+def _cohesion_boost(index: TagIndex, rows: np.ndarray, scores: np.ndarray,
+                    boost: float) -> np.ndarray:
+    """Boosts `scores` in place; returns the positions that were boosted."""
+    if len(rows) < 2:
+        return np.zeros(0, dtype=np.intp)
+    bits = index.bits[rows]
+    anchors = list(islice(_top_order(scores, 16), 16))
+    sims = _pairwise_jaccard(bits, bits[anchors])
+    # A post is not its own anchor.
+    sims[anchors, np.arange(len(anchors))] = -1.0
+    cohesion = sims.max(axis=1)
+    boosted = np.flatnonzero(cohesion > 0)
+    scores[boosted] = np.round(np.minimum(1.0, scores[boosted] + boost * cohesion[boosted]), 4)
+    return boosted
+
+
+def _serendipity_rows(index: TagIndex, rows: np.ndarray, feed_rows: np.ndarray,
+                      n: int) -> List[int]:
+    if not len(rows):
+        return []
+    if not len(feed_rows):
+        return list(range(min(n, len(rows))))
+    cand_bits = index.bits[rows]
+    feed_bits = index.bits[feed_rows]
+    dissim = 1.0 - _pairwise_jaccard(cand_bits, feed_bits).max(axis=1)
+    return list(islice(_top_order(dissim, n), n))
 
 
-def apply_tag_cohesion_boost(posts: List[dict], boost: float = TAG_COHESION_BOOST) -> None:
+def assemble_feed(scored: List[dict], n: int, index: Optional[TagIndex] = None) -> tuple:
+    """
+    Greedy diverse top-n of `scored`. Returns (feed, seen_tag_counts), the
+    latter counting every label occurrence in the feed.
+    """
+    if index is None:
+        index = build_tag_index(scored)
+    picked, seen_vec = _assemble_feed_rows(index, _index_rows(index, scored),
+                                           _post_scores(scored), n)
+    seen_tag_counts = defaultdict(int)
+    for label, i in index.labels.items():
+        if seen_vec[i]:
+            seen_tag_counts[label] = int(seen_vec[i])
+    return [scored[i] for i in picked], seen_tag_counts
+
+
+def apply_tag_cohesion_boost(posts: List[dict], boost: float = TAG_COHESION_BOOST,
+                             index: Optional[TagIndex] = None) -> None:
     """
     Lightly boosts posts that share tags with other strong candidates so
     network views have richer tag-linked structure.
     """
     if len(posts) < 2:
         return
-    anchors = sorted(posts, key=lambda x: x.get("score", 0), reverse=True)[: min(16, len(posts))]
-    for post in posts:
-        tags = post.get("mlTags") or {}
-        sims = [
-            tag_similarity(tags, a.get("mlTags") or {})
-            for a in anchors
-            if a is not post
-        ]
-        if not sims:
-            continue
-        cohesion = max(sims)
-        if cohesion <= 0:
-            continue
-        post["score"] = round(min(1.0, float(post.get("score", 0)) + boost * cohesion), 4)
-
-
-def pick_serendipity(posts: List[dict], feed: List[dict], n: int) -> List[dict]:
-    candidates = [p for p in posts if p not in feed]
-    if not candidates:
-        return []
-    def dissimilarity(post):
-        if not feed:
-            return 1.0
-        tags = post.get("mlTags") or {}
-        return 1.0 - max(tag_similarity(tags, fp.get("mlTags") or {}) for fp in feed)
-    candidates.sort(key=dissimilarity, reverse=True)
-    return candidates[:n]
+    if index is None:
+        index = build_tag_index(posts)
+    scores = _post_scores(posts)
+    for i in _cohesion_boost(index, _index_rows(index, posts), scores, boost).tolist():
+        posts[i]["score"] = float(scores[i])
+
+
+def pick_serendipity(posts: List[dict], feed: List[dict], n: int,
+                     index: Optional[TagIndex] = None) -> List[dict]:
+    if index is None:
+        index = build_tag_index(posts + feed)
+    feed_rows = _index_rows(index, feed)
+    in_feed = np.zeros(len(index.bits), dtype=bool)
+    in_feed[feed_rows] = True
+    rows = _index_rows(index, posts)
+    candidates = np.flatnonzero(~in_feed[rows])
+    picked = _serendipity_rows(index, rows[candidates], feed_rows, n)
+    return [posts[i] for i in candidates[picked].tolist()]
 
 
 # ==========================================
@@ -472,43 +849,59 @@ def recommend(req: RecommendRequest):
     n_serendipity  = max(1, int(top_n * SERENDIPITY_RATIO))
     n_personalised = top_n - n_serendipity
 
-    # First pass — score without tag decay
-    empty_seen: dict = {}
-    for post in posts:
-        post["score"]      = compute_hybrid_score(
-            user_id,
-            post,
-            affinity,
-            empty_seen,
-            exploration,
-            followed_artist_ids,
-            creator_behavior_stats,
-        )
-        post["ncf_weight"] = _model.ncf_weight(user_id) if user_id else 0.0
-
-    apply_tag_cohesion_boost(posts)
-    personalised, seen_counts = assemble_feed(posts, n_personalised)
-
-    # Second pass — re-score remainder with decay
-    remaining = [p for p in posts if p not in personalised]
-    for post in remaining:
-        post["score"] = compute_hybrid_score(
+    # NCF blend weight and scores for every candidate (one batched forward
+    # pass); the model does not change during a request, so both scoring
+    # passes share them.
+    ncf_alpha = _model.ncf_weight(user_id) if user_id else 0.0
+    ncf_scores: Dict[str, float] = {}
+    if ncf_alpha > 0.0:
+        post_ids = [pid for pid in (str(p.get("_id", "")) for p in posts) if pid]
+        if post_ids:
+            ncf_scores = dict(zip(post_ids, _model.predict_batch(user_id, post_ids).tolist()))
+
+    # Everything is computed on index rows; no post dict is written. The
+    # non-tag part of each score (_hybrid_context) doesn't depend on
+    # seen-tag counts, so both passes share it.
+    tag_index = build_tag_index(posts)
+    contexts = np.array([
+        _hybrid_context(
             user_id,
             post,
-            affinity,
-            seen_counts,
-            exploration,
             followed_artist_ids,
             creator_behavior_stats,
+            ncf_scores.get(str(post.get("_id", ""))),
+            ncf_alpha,
         )
+        for post in posts
+    ], dtype=np.float64)
+    all_rows = np.arange(len(posts))
 
-    apply_tag_cohesion_boost(remaining, boost=TAG_COHESION_BOOST * 0.6)
-    serendipity = pick_serendipity(remaining, personalised, n_serendipity)
-    for post in serendipity:
-        post["is_serendipity"] = True
-
-    final = personalised + serendipity
-    final.sort(key=lambda x: x.get("score", 0), reverse=True)
+    # First pass — score without tag decay
+    terms = tag_score_terms(tag_index, affinity)
+    base = _tag_base_scores(tag_index, terms)
+    scores = _blend_hybrid_batch(_explore(base.copy(), exploration), contexts)
+    _cohesion_boost(tag_index, all_rows, scores, TAG_COHESION_BOOST)
+    feed_rows, seen_vec = _assemble_feed_rows(tag_index, all_rows, scores, n_personalised)
+
+    # Second pass — re-score remainder with decay, as a correction to the
+    # first pass's tag scores
+    in_feed = np.zeros(len(posts), dtype=bool)
+    in_feed[feed_rows] = True
+    rest = np.flatnonzero(~in_feed)
+    rest_scores = _blend_hybrid_batch(
+        _explore((base - _decay_correction(tag_index, terms, seen_vec))[rest], exploration),
+        contexts[rest])
+    _cohesion_boost(tag_index, rest, rest_scores, TAG_COHESION_BOOST * 0.6)
+    scores[rest] = rest_scores
+    serendipity_rows = rest[_serendipity_rows(tag_index, rest, all_rows[feed_rows], n_serendipity)].tolist()
+
+    # Scores go on shallow copies of the picked posts only; the request's
+    # post dicts are left as they came in.
+    final = [{**posts[i], "score": float(scores[i]), "ncf_weight": ncf_alpha}
+             for i in feed_rows]
+    final += [{**posts[i], "score": float(scores[i]), "ncf_weight": ncf_alpha, "is_serendipity": True}
+              for i in serendipity_rows]
+    final.sort(key=lambda x: x["score"], reverse=True)
     return final
 
 
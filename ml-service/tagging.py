@@ -5,13 +5,21 @@ import torch
 from transformers import CLIPProcessor, CLIPModel
 import io
 import os
+import asyncio
 import re
 import json
 import base64
+import gc
+import heapq
+import hashlib
 import urllib.request
+import weakref
 import torch.nn.functional as F
+from torch.nn.utils.rnn import pad_sequence
+from torchvision.transforms import InterpolationMode, v2
 import logging
 from threading import Lock
+from collections import OrderedDict
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,25 +36,49 @@ app.add_middleware(
 
 device = "cpu"
 MODEL_NAME = "openai/clip-vit-base-patch32"
+# Opt-in bf16 autocast for the image encoder. Roughly halves ViT time on CPUs
+# with AVX-512 BF16/AMX, but shifts cosines in the 3rd decimal, so it is off
+# by default to keep tags stable.
+CLIP_BF16 = os.getenv("CLIP_BF16", "").strip().lower() in ("1", "true", "yes")
+# Opt-in torch.compile of the image encoder, warmed up at init for every
+# micro-batch size (see build_image_encoder). Compiling takes a while and
+# needs a C++ toolchain, so it stays off unless requested.
+CLIP_COMPILE = os.getenv("CLIP_COMPILE", "").strip().lower() in ("1", "true", "yes")
 model = None
 processor = None
+image_encoder = None
+image_transform = None
 TEXT_EMBEDDINGS = {}
+# All categories' text embeddings stacked into one [N_total, 512] matrix,
+# with each category's (start, end) rows, so /analyze runs one matmul.
+ALL_LABEL_EMB = None
+CATEGORY_SLICES = {}
 INIT_ERROR = None
 INIT_LOCK = Lock()
+# Stacked label embeddings are cached here so restarts skip the text encoder.
+EMBEDDING_CACHE_DIR = os.getenv(
+    "CLIP_EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".clip_cache"),
+)
 
 # -------- MODEL + EMBEDDING INIT -------- #
+def clip_ready():
+    """Lock-free check that ensure_clip_ready has already completed."""
+    return model is not None and processor is not None and ALL_LABEL_EMB is not None
+
+
 def ensure_clip_ready():
     """
     Lazily initialize the CLIP model and taxonomy embeddings.
     This avoids blocking process startup, so the web service can bind its port quickly.
     """
-    global model, processor, TEXT_EMBEDDINGS, INIT_ERROR
+    global model, processor, image_encoder, image_transform, TEXT_EMBEDDINGS, ALL_LABEL_EMB, CATEGORY_SLICES, INIT_ERROR
 
-    if model is not None and processor is not None and TEXT_EMBEDDINGS:
+    if clip_ready():
         return True
 
     with INIT_LOCK:
-        if model is not None and processor is not None and TEXT_EMBEDDINGS:
+        if clip_ready():
             return True
 
         try:
@@ -57,6 +89,19 @@ def ensure_clip_ready():
                 processor = CLIPProcessor.from_pretrained(MODEL_NAME)
                 model.eval()
 
+            if image_encoder is None:
+                image_encoder = build_image_encoder()
+            if image_transform is None:
+                image_transform = build_image_transform()
+
+            if not TEXT_EMBEDDINGS:
+                cached = load_cached_text_embeddings()
+                if cached is not None:
+                    ALL_LABEL_EMB, CATEGORY_SLICES = cached
+                    for category, (start, end) in CATEGORY_SLICES.items():
+                        TEXT_EMBEDDINGS[category] = ALL_LABEL_EMB[start:end]
+                    logger.info(f"Loaded cached taxonomy embeddings: {ALL_LABEL_EMB.shape}")
+
             if not TEXT_EMBEDDINGS:
                 logger.info("Pre-computing taxonomy embeddings for Loom...")
                 for category, labels in ART_TAXONOMY.items():
@@ -66,12 +111,29 @@ def ensure_clip_ready():
                         logger.info(f"Loaded {category}: {emb.shape}")
                     else:
                         logger.warning(f"Failed to compute embeddings for category: {category}")
+
+            if TEXT_EMBEDDINGS and ALL_LABEL_EMB is None:
+                slices, start = {}, 0
+                for category, emb in TEXT_EMBEDDINGS.items():
+                    slices[category] = (start, start + emb.shape[0])
+                    start += emb.shape[0]
+                CATEGORY_SLICES = slices
+                ALL_LABEL_EMB = torch.cat(list(TEXT_EMBEDDINGS.values()), dim=0).contiguous()
+                if len(TEXT_EMBEDDINGS) == len(ART_TAXONOMY):
+                    save_cached_text_embeddings(ALL_LABEL_EMB, CATEGORY_SLICES)
+
+            # The analyzer only needs image features from here on, so free
+            # the text encoder (~60 MB) once the label matrix exists.
+            if ALL_LABEL_EMB is not None and getattr(model, "text_model", None) is not None:
+                model.text_model = None
+                model.text_projection = None
+                gc.collect()
         except Exception as e:
             INIT_ERROR = str(e)
             logger.error(f"CLIP initialization failed: {e}")
             return False
 
-    return model is not None and processor is not None and bool(TEXT_EMBEDDINGS)
+    return clip_ready()
 
 
 # -------- LOOM SYSTEM CONTEXT -------- #
@@ -80,6 +142,7 @@ def ensure_clip_ready():
 # platform for creatives — so scores reflect how artists and their audience
 # would describe and find work, rather than generic image classification.
 LOOM_CONTEXT = "On Loom, a social art platform for creatives, this artwork is tagged as:"
+CONTEXT_TOKEN_IDS = None  # LOOM_CONTEXT token ids, filled on first use
 
 
 # -------- EXPANDED ART TAXONOMY -------- #
@@ -335,6 +398,16 @@ SUBJECT_KEYWORD_HINTS = {
     "abstract": ["abstract art", "geometric abstract"],
 }
 
+# Pattern for normalizing GPT subject phrases, compiled once at import.
+_NORMALIZE_RE = re.compile(r"[^a-z0-9\s\-]")
+
+# Keyword -> bool mask over ART_TAXONOMY["subject"], so hint matching in
+# /analyze is an OR of a few masks instead of a per-label set lookup.
+SUBJECT_HINT_MASKS = {
+    keyword: torch.tensor([label in labels for label in ART_TAXONOMY["subject"]])
+    for keyword, labels in SUBJECT_KEYWORD_HINTS.items()
+}
+
 MIN_TOTAL_TAGS = 6
 MIN_CATEGORY_TAGS = {
     "subject": 2,
@@ -356,15 +429,89 @@ def extract_tensor(output):
     return output[0]
 
 
+def build_image_transform():
+    """
+    Mirrors CLIPProcessor's image path (shortest-edge bicubic resize, center
+    crop, rescale, normalize) as one torchvision pipeline, taking sizes and
+    mean/std from the loaded processor.
+    """
+    image_processor = processor.image_processor
+    crop = image_processor.crop_size
+    return v2.Compose([
+        v2.Resize(
+            image_processor.size["shortest_edge"],
+            interpolation=InterpolationMode.BICUBIC,
+            antialias=True,
+        ),
+        v2.CenterCrop((crop["height"], crop["width"])),
+        v2.PILToTensor(),
+        v2.ToDtype(torch.float32, scale=True),
+        v2.Normalize(mean=image_processor.image_mean, std=image_processor.image_std),
+    ])
+
+
+def build_image_encoder():
+    """
+    Returns a callable mapping pixel_values to image features. With
+    CLIP_COMPILE set it is torch.compile'd and warmed up for batch sizes
+    1..BATCH_MAX_SIZE, so the micro-batcher never compiles on the request
+    path; any compile failure falls back to eager mode.
+    """
+    def encode(pixel_values):
+        return extract_tensor(model.get_image_features(pixel_values=pixel_values))
+
+    if not CLIP_COMPILE:
+        return encode
+
+    try:
+        compiled = torch.compile(encode)
+        size = model.config.vision_config.image_size
+        with torch.no_grad(), torch.autocast(device_type=device, dtype=torch.bfloat16, enabled=CLIP_BF16):
+            # Dynamo specializes size-1 dims, so batch 1 gets its own graph;
+            # one graph with a dynamic batch dim then covers 2..BATCH_MAX_SIZE.
+            compiled(torch.zeros(1, 3, size, size, device=device))
+            if BATCH_MAX_SIZE > 1:
+                batch = torch.zeros(2, 3, size, size, device=device)
+                torch._dynamo.mark_dynamic(batch, 0, min=2, max=BATCH_MAX_SIZE)
+                compiled(batch)
+        logger.info("Compiled CLIP image encoder.")
+        return compiled
+    except Exception as e:
+        logger.warning(f"torch.compile failed, using eager image encoder: {e}")
+        return encode
+
+
+def tokenize_with_context(labels):
+    """
+    Builds CLIP text inputs for "{LOOM_CONTEXT} {label}" without re-tokenizing
+    the shared prefix per label. CLIP's pre-tokenizer splits on whitespace, so
+    joining the prefix and label ids gives the same sequence as the full string.
+    """
+    global CONTEXT_TOKEN_IDS
+    tokenizer = processor.tokenizer
+    if CONTEXT_TOKEN_IDS is None:
+        CONTEXT_TOKEN_IDS = tokenizer(LOOM_CONTEXT, add_special_tokens=False)["input_ids"]
+
+    label_ids = tokenizer(list(labels), add_special_tokens=False)["input_ids"]
+    sequences = [
+        torch.tensor([tokenizer.bos_token_id, *CONTEXT_TOKEN_IDS, *ids, tokenizer.eos_token_id])
+        for ids in label_ids
+    ]
+    input_ids = pad_sequence(sequences, batch_first=True, padding_value=tokenizer.pad_token_id)
+    attention_mask = pad_sequence(
+        [torch.ones(len(seq), dtype=torch.long) for seq in sequences],
+        batch_first=True,
+    )
+    return {"input_ids": input_ids.to(device), "attention_mask": attention_mask.to(device)}
+
+
 def compute_text_embeddings(labels):
     """
     Encodes a list of labels with the Loom system context prefix,
     anchoring CLIP's embedding space to an art-discovery social platform.
     """
     try:
-        # Prepend context to every label
-        contextualized = [f"{LOOM_CONTEXT} {label}" for label in labels]
-        inputs = processor(text=contextualized, return_tensors="pt", padding=True).to(device)
+        inputs = tokenize_with_context(labels)
         with torch.no_grad():
             raw = model.get_text_features(**inputs)
             features = extract_tensor(raw)
@@ -373,9 +520,47 @@ def compute_text_embeddings(labels):
         logger.error(f"Text embedding error: {e}")
         return None
 
+def embedding_cache_paths():
+    """
+    Returns the (tensor, slices) cache paths for the current taxonomy.
+    The key covers every input of compute_text_embeddings, so editing a
+    label, the Loom context or the model invalidates the cache.
+    """
+    key_source = json.dumps(ART_TAXONOMY, sort_keys=True) + LOOM_CONTEXT + MODEL_NAME
+    key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(EMBEDDING_CACHE_DIR, f"text_emb_{key}")
+    return f"{base}.pt", f"{base}.json"
+
+def load_cached_text_embeddings():
+    tensor_path, slices_path = embedding_cache_paths()
+    if not (os.path.exists(tensor_path) and os.path.exists(slices_path)):
+        return None
+    try:
+        with open(slices_path, "r", encoding="utf-8") as f:
+            slices = {cat: (int(start), int(end)) for cat, (start, end) in json.load(f).items()}
+        emb = torch.load(tensor_path, map_location="cpu", mmap=True)
+        return emb, slices
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable embedding cache: {e}")
+        return None
+
+def save_cached_text_embeddings(emb, slices):
+    tensor_path, slices_path = embedding_cache_paths()
+    try:
+        os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+        torch.save(emb, tensor_path)
+        with open(slices_path, "w", encoding="utf-8") as f:
+            json.dump(slices, f)
+    except Exception as e:
+        logger.warning(f"Could not write embedding cache: {e}")
+
 def infer_subjects_with_gpt(image_bytes):
+    """
+    Returns up to 6 normalized subject phrases for the image, [] when GPT
+    hints are disabled, or None when the request or parsing failed.
+    """
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    if not api_key:
+    if not api_key or not image_bytes:
         return []
 
     try:
@@ -398,6 +583,7 @@ def infer_subjects_with_gpt(image_bytes):
                     ],
                 }
             ],
+            "text": {"format": {"type": "json_object"}},
             "max_output_tokens": 80,
         }
 
@@ -413,42 +599,33 @@ def infer_subjects_with_gpt(image_bytes):
         with urllib.request.urlopen(req, timeout=8) as resp:
             raw = json.loads(resp.read().decode("utf-8"))
 
-        text = str(raw.get("output_text") or "").lower()
+        # output_text is an SDK convenience the raw HTTP response may omit,
+        # so fall back to the message content.
+        text = str(raw.get("output_text") or "")
         if not text:
             chunks = []
             for block in raw.get("output", []):
                 for item in block.get("content", []):
                     if item.get("type") in ("output_text", "text"):
                         chunks.append(item.get("text", ""))
-            text = " ".join(chunks).lower()
+            text = "".join(chunks)
 
-        # Parse structured JSON first, fallback to token extraction.
+        # JSON mode guarantees a JSON object; anything else (e.g. a reply
+        # truncated by max_output_tokens) just means no hints.
+        parsed = json.loads(text)
         parsed_subjects = []
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            try:
-                parsed = json.loads(match.group(0))
-                if isinstance(parsed, dict) and isinstance(parsed.get("subjects"), list):
-                    parsed_subjects = [
-                        str(s).strip().lower()
-                        for s in parsed["subjects"]
-                        if str(s).strip()
-                    ]
-            except Exception:
-                parsed_subjects = []
-
-        if not parsed_subjects:
+        if isinstance(parsed, dict) and isinstance(parsed.get("subjects"), list):
             parsed_subjects = [
-                s.strip().lower()
-                for s in re.split(r"[,\n]", text)
-                if s.strip()
+                str(s).strip().lower()
+                for s in parsed["subjects"]
+                if str(s).strip()
             ]
 
         # Keep short, unique phrases only.
         deduped = []
         seen = set()
         for phrase in parsed_subjects:
-            normalized = re.sub(r"[^a-z0-9\s\-]", "", phrase).strip()
+            normalized = _NORMALIZE_RE.sub("", phrase).strip()
             if not normalized:
                 continue
             if len(normalized.split()) > 4:
@@ -462,68 +639,246 @@ def infer_subjects_with_gpt(image_bytes):
         return deduped
     except Exception as e:
         logger.warning(f"GPT subject primer unavailable, continuing with CLIP-only subjects: {e}")
-        return []
+        return None
 
 def build_subject_hints(subject_phrases):
-    hints = set()
+    """
+    Returns a bool mask over the subject labels hinted by any GPT phrase,
+    or None when no keyword matched.
+    """
+    hints = None
     for phrase in subject_phrases:
-        for keyword, labels in SUBJECT_KEYWORD_HINTS.items():
+        for keyword, mask in SUBJECT_HINT_MASKS.items():
             if keyword in phrase:
-                for label in labels:
-                    hints.add(label)
+                hints = mask if hints is None else hints | mask
     return hints
 
 
 # -------- ANALYZER -------- #
 
+# Smallest short side a JPEG is draft-decoded to (2x the CLIP input).
+DECODE_MIN_SIDE = 448
+
+# Longest side of the copy sent to GPT; subject naming needs no more.
+GPT_IMAGE_SIDE = 512
+
+# Uploads are read in chunks and rejected with 413 past this size.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+# Tags for recently analyzed uploads, keyed by SHA-256 of the file bytes, so
+# re-uploads of the same image skip CLIP and the GPT call. Only touched from
+# the event loop, so no lock is needed.
+RESULT_CACHE_SIZE = 10000
+RESULT_CACHE = OrderedDict()
+
+
+async def read_upload(upload):
+    """
+    Reads an UploadFile in chunks, failing with 413 as soon as it grows past
+    MAX_UPLOAD_BYTES instead of buffering an arbitrarily large body first.
+    """
+    buf = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        buf += chunk
+        if len(buf) > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image exceeds {MAX_UPLOAD_BYTES} bytes.",
+            )
+    return bytes(buf)
+
+
+def decode_upload(contents):
+    """
+    Decodes the upload once and returns (pixel_values, gpt_jpeg): CLIP pixel
+    values [1, 3, 224, 224] and, when GPT hints are enabled, a downscaled
+    JPEG for the OpenAI request (None otherwise).
+    """
+    img = Image.open(io.BytesIO(contents))
+    # Let libjpeg decode large photos at a reduced DCT scale instead of full
+    # resolution, keeping the short side >= DECODE_MIN_SIDE so the processor's
+    # bicubic downscale to 224 still has detail to work with.
+    short_side = min(img.size)
+    if img.format == "JPEG" and short_side > DECODE_MIN_SIDE:
+        img.draft("RGB", (
+            img.width * DECODE_MIN_SIDE // short_side,
+            img.height * DECODE_MIN_SIDE // short_side,
+        ))
+    img = img.convert("RGB")
+
+    gpt_jpeg = None
+    if os.getenv("OPENAI_API_KEY", "").strip():
+        small = img.copy()
+        small.thumbnail((GPT_IMAGE_SIDE, GPT_IMAGE_SIDE))
+        buf = io.BytesIO()
+        small.save(buf, "JPEG", quality=85)
+        gpt_jpeg = buf.getvalue()
+
+    return image_transform(img).unsqueeze(0).to(device), gpt_jpeg
+
+
+def encode_pixel_batch(pixel_values):
+    """
+    Runs the image encoder on a [B, 3, 224, 224] batch and returns
+    L2-normalized embeddings [B, 512]. Called from a worker thread;
+    torch releases the GIL during the forward pass.
+    """
+    with torch.no_grad(), torch.autocast(device_type=device, dtype=torch.bfloat16, enabled=CLIP_BF16):
+        img_emb = image_encoder(pixel_values)
+        return F.normalize(img_emb.float(), p=2, dim=-1)
+
+
+# -------- IMAGE MICRO-BATCHING -------- #
+# Concurrent uploads are coalesced into one encoder call: the first queued
+# image opens a short window, and everything that arrives within it (up to
+# BATCH_MAX_SIZE) is stacked into a single forward pass.
+BATCH_WINDOW_S = 0.015
+BATCH_MAX_SIZE = 8
+# One queue + worker per event loop: asyncio primitives are bound to the loop
+# they were first used on, so a module-level pair breaks under a second loop
+# (tests, reloads). Entries vanish with their loop.
+_batchers = weakref.WeakKeyDictionary()
+
+
+async def _batch_worker(queue):
+    loop = asyncio.get_running_loop()
+    items = []
+    try:
+        while True:
+            items = [await queue.get()]
+            deadline = loop.time() + BATCH_WINDOW_S
+            while len(items) < BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                pixels = torch.cat([pixel_values for pixel_values, _ in items], dim=0)
+                embs = await asyncio.to_thread(encode_pixel_batch, pixels)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for i, (_, future) in enumerate(items):
+                if not future.done():
+                    future.set_result(embs[i:i + 1])
+    except asyncio.CancelledError:
+        for _, future in items:
+            if not future.done():
+                future.cancel()
+        raise
+
+
+async def embed_image(pixel_values):
+    """
+    Returns the L2-normalized CLIP embedding [1, 512] for preprocessed
+    pixel values, batching the encoder call with any concurrent requests.
+    """
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None or batcher[1].done():
+        queue = batcher[0] if batcher is not None else asyncio.Queue()
+        batcher = _batchers[loop] = (queue, loop.create_task(_batch_worker(queue)))
+    queue, _ = batcher
+
+    future = loop.create_future()
+    await queue.put((pixel_values, future))
+    return await future
+
+
+@app.on_event("shutdown")
+async def stop_batch_worker():
+    batcher = _batchers.pop(asyncio.get_running_loop(), None)
+    if batcher is None:
+        return
+    queue, task = batcher
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    while not queue.empty():
+        _, future = queue.get_nowait()
+        if not future.done():
+            future.cancel()
+
+
 @app.post("/analyze")
 async def analyze(image: UploadFile = File(...)):
-    if not ensure_clip_ready():
+    # Only hop to a worker thread while init (model load) is still pending.
+    if not clip_ready() and not await asyncio.to_thread(ensure_clip_ready):
         detail = "Embeddings not initialized."
         if INIT_ERROR:
             detail = f"{detail} {INIT_ERROR}"
         raise HTTPException(status_code=503, detail=detail)
 
     try:
-        # 1. Load and convert image
-        contents = await image.read()
-        img = Image.open(io.BytesIO(contents)).convert("RGB")
-        gpt_subjects = infer_subjects_with_gpt(contents)
+        # 1. Decode the image off the event loop
+        contents = await read_upload(image)
+        cache_key = hashlib.sha256(contents).digest()
+        cached = RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            RESULT_CACHE.move_to_end(cache_key)
+            return list(cached)
+
+        pixel_values, gpt_jpeg = await asyncio.to_thread(decode_upload, contents)
+
+        # 2. Start the GPT subject request (blocking HTTP in a worker thread)
+        # and run CLIP while it is in flight, so latency is max(), not sum.
+        gpt_task = asyncio.create_task(asyncio.to_thread(infer_subjects_with_gpt, gpt_jpeg))
+        try:
+            img_emb = await embed_image(pixel_values)
+        except BaseException:
+            gpt_task.cancel()
+            raise
+        gpt_subjects = await gpt_task
+        # A failed GPT call (timeout, API error) must not pin CLIP-only tags
+        # for this image in RESULT_CACHE.
+        cacheable = gpt_subjects is not None
+        gpt_subjects = gpt_subjects or []
         subject_hints = build_subject_hints(gpt_subjects)
 
-        # 2. Get image embedding
-        inputs = processor(images=img, return_tensors="pt").to(device)
-        with torch.no_grad():
-            raw = model.get_image_features(**inputs)
-            img_emb = extract_tensor(raw)
-            img_emb = F.normalize(img_emb.float(), p=2, dim=-1)
+        # 3. Score against every taxonomy label at once
+        # Cosine similarity: [1, 512] @ [512, N_total] -> [N_total]
+        all_scores = (img_emb @ ALL_LABEL_EMB.T).squeeze(0)
+
+        # Optional GPT hints only nudge subject confidence slightly;
+        # CLIP scoring still determines all final tags. The bonus is added
+        # in float64 so thresholds and rounding match Python float math.
+        all_conf = all_scores.double()
+        if subject_hints is not None and "subject" in CATEGORY_SLICES:
+            start, end = CATEGORY_SLICES["subject"]
+            all_conf[start:end] += subject_hints.double() * 0.035
+        raw_list = all_scores.tolist()
+        conf_list = all_conf.tolist()
 
-        # 3. Score against each taxonomy category
         results = {}
         all_candidates = []
-        for category, text_emb in TEXT_EMBEDDINGS.items():
-            # Cosine similarity: [1, 512] @ [512, N] -> [1, N]
-            scores = (img_emb @ text_emb.T).squeeze(0)
+        used = set()  # (category, normalized label) of every tag in results
+        for category, (start, end) in CATEGORY_SLICES.items():
+            raw = raw_list[start:end]
+            conf = conf_list[start:end]
             threshold = CATEGORY_THRESHOLDS.get(category, 0.21)
             labels = ART_TAXONOMY[category]
 
-            category_tags = []
-            for i, score in enumerate(scores):
-                conf = float(score.item())
-                # Optional GPT hints only nudge subject confidence slightly;
-                # CLIP scoring still determines all final tags.
-                if category == "subject" and labels[i] in subject_hints:
-                    conf += 0.035
+            for label, c in zip(labels, conf):
                 all_candidates.append({
                     "category": category,
-                    "label": labels[i],
-                    "confidence": round(min(conf, 1.0), 3),
+                    "label": label,
+                    "confidence": round(min(c, 1.0), 3),
                 })
-                if conf >= threshold:
-                    category_tags.append({
-                        "label": labels[i],
-                        "confidence": round(min(conf, 1.0), 3),
-                    })
+            keep = torch.nonzero(all_conf[start:end] >= threshold, as_tuple=True)[0].tolist()
+            category_tags = [
+                {"label": labels[i], "confidence": round(min(conf[i], 1.0), 3)}
+                for i in keep
+            ]
 
             # Sort by confidence descending — all above threshold are returned
             category_tags.sort(key=lambda x: x["confidence"], reverse=True)
@@ -531,27 +886,27 @@ async def analyze(image: UploadFile = File(...)):
             min_for_category = MIN_CATEGORY_TAGS.get(category, 0)
             if min_for_category > 0 and len(category_tags) < min_for_category:
                 existing = {t.get("label", "").strip().lower() for t in category_tags}
-                ranked = sorted(
-                    [
-                        {
-                            "label": labels[i],
-                            "confidence": round(min(float(scores[i].item()), 1.0), 3),
-                        }
-                        for i in range(len(labels))
-                    ],
-                    key=lambda x: x["confidence"],
-                    reverse=True,
+                # Only the best min + len(existing) labels can be reached before
+                # the loop fills up; nlargest keeps sorted()'s tie order.
+                ranked = heapq.nlargest(
+                    min_for_category + len(existing),
+                    range(len(labels)),
+                    key=lambda i: round(min(raw[i], 1.0), 3),
                 )
-                for item in ranked:
-                    key = item["label"].strip().lower()
+                for i in ranked:
+                    key = labels[i].strip().lower()
                     if not key or key in existing:
                         continue
-                    category_tags.append(item)
+                    category_tags.append({
+                        "label": labels[i],
+                        "confidence": round(min(raw[i], 1.0), 3),
+                    })
                     existing.add(key)
                     if len(category_tags) >= min_for_category:
                         break
 
             results[category] = category_tags
+            used.update((category, t["label"].strip().lower()) for t in category_tags)
 
         # Add GPT subject phrases as low-confidence supplemental tags.
         if gpt_subjects:
@@ -569,18 +924,19 @@ async def analyze(image: UploadFile = File(...)):
                     "confidence": 0.265,
                 })
                 existing_subject_labels.add(normalized)
+                used.add(("subject", normalized))
 
         # Guarantee a minimum number of tags across the whole result.
-        total_tags = sum(len(v) for v in results.values() if isinstance(v, list))
+        total_tags = sum(len(v) for v in results.values())
         if total_tags < MIN_TOTAL_TAGS:
-            used = {
-                (cat, tag.get("label", "").strip().lower())
-                for cat, tags in results.items()
-                if isinstance(tags, list)
-                for tag in tags
-                if isinstance(tag, dict)
-            }
-            for candidate in sorted(all_candidates, key=lambda x: x["confidence"], reverse=True):
+            # At most len(used) candidates are skipped before the fill is
+            # done, so only the shortfall plus that many need ranking.
+            ranked = heapq.nlargest(
+                MIN_TOTAL_TAGS - total_tags + len(used),
+                all_candidates,
+                key=lambda x: x["confidence"],
+            )
+            for candidate in ranked:
                 key = (candidate["category"], candidate["label"].strip().lower())
                 if key in used:
                     continue
@@ -593,22 +949,22 @@ async def analyze(image: UploadFile = File(...)):
                 if total_tags >= MIN_TOTAL_TAGS:
                     break
 
-      # ... (keep your CLIP scoring loop that fills all_candidates) ...
-
-        # 1. Sort every single tag found by its confidence score
-        # ... (after your loop that fills all_candidates) ...
-
-        # 1. Sort everything by confidence immediately
-        all_candidates.sort(key=lambda x: x["confidence"], reverse=True)
-
-        # 2. Grab the top 10, regardless of the threshold
-        # This ensures you NEVER return an empty list.
-        top_10_labels = [item["label"] for item in all_candidates[:10]]
+        # 4. Grab the top 10 by confidence, regardless of the threshold
+        # This ensures you NEVER return an empty list. nlargest returns the
+        # same order as a full stable sort, without sorting all ~190.
+        top_candidates = heapq.nlargest(10, all_candidates, key=lambda x: x["confidence"])
+        top_10_labels = [item["label"] for item in top_candidates]
 
         logger.info(f"Final Tags being sent: {top_10_labels}") # Add this to see it in your terminal
+        if cacheable:
+            RESULT_CACHE[cache_key] = tuple(top_10_labels)
+            if len(RESULT_CACHE) > RESULT_CACHE_SIZE:
+                RESULT_CACHE.popitem(last=False)
         return top_10_labels
     
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from bot_detector import (
+    FEATURE_KEYS,
+    EnsembleBotDetector,
+    LogisticBotDetector,
+    NeuralBotDetector,
+    build_training_dataset,
+)
+
+
+def _sparse_rows(n=600, seed=0):
+    """Rows filling only a few behavior fields, so most feature columns are constant."""
+    rng = np.random.default_rng(seed)
+    keys = ["eventCount", "intervalRegularity", "midnightActivityRatio",
+            "fastReplyPct", "avgTimeOnPost", "likeCommentRatio"]
+    rows = []
+    for i in range(n):
+        bot = i % 2 == 0
+        features = {k: float(rng.normal(5.0 if bot else 3.0, 2.0)) for k in keys}
+        rows.append({"behaviorFeatures": features, "isBot": bot})
+    return rows
+
+
+class QuantizedExportTest(unittest.TestCase):
+    def test_int8_round_trip_tracks_float_model(self):
+        np.random.seed(0)
+        X, y = build_training_dataset(_sparse_rows())
+        self.assertGreater(int((X.std(axis=0) == 0).sum()), 0)
+
+        detector = EnsembleBotDetector()
+        detector.fit(X, y)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model_int8.npz"
+            detector.save(path, quantize=True)
+            int8 = EnsembleBotDetector.load(path)
+
+        for name in ("neural", "logistic"):
+            ref = getattr(detector, name).predict_proba_matrix(X, fast=False)
+            got = getattr(int8, name).predict_proba_matrix(X, fast=False)
+            self.assertLess(float(np.abs(got - ref).max()), 0.02, name)
+
+
+class FoldedInferenceTest(unittest.TestCase):
+    def test_low_variance_large_mean_column_is_kept(self):
+        # Column 0 alone decides the label but has std 0.3 around 5000, far
+        # below 1e-4 * |mu|; it must not be mistaken for a constant column.
+        rng = np.random.default_rng(1)
+        n = 2000
+        X = np.zeros((n, len(FEATURE_KEYS)), dtype=np.float32)
+        X[:, 0] = 5000.0 + rng.normal(0.0, 0.3, n)
+        y = (X[:, 0] > 5000.0).astype(np.float32)
+
+        np.random.seed(1)
+        for model in (LogisticBotDetector(), NeuralBotDetector(epochs=200)):
+            model.fit(X, y)
+            self.assertFalse(model.constant[0])
+            self.assertTrue(model.constant[1:].all())
+            folded = model.predict_proba_matrix(X, fast=False)
+            if isinstance(model, LogisticBotDetector):
+                unfolded = model._sigmoid(model._normalize_apply(X) @ model.w + model.b)
+            else:
+                unfolded = model._forward(model._normalize_apply(X))[0]
+            name = type(model).__name__
+            # Folding leaves x @ (w/sigma) and mu/sigma @ w to cancel in
+            # float32 (~1e-3 here); allow the sigmoid LUT's 2e-3 budget.
+            self.assertLess(float(np.abs(folded - unfolded).max()), 5e-3, name)
+            self.assertGreater(float(((folded >= 0.5) == y).mean()), 0.9, name)
+
+
+if __name__ == "__main__":
+    unittest.main()